@@ -1,9 +1,21 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 from streamlit_gsheets import GSheetsConnection
 import pandas as pd
-import plotly.express as px
 from datetime import datetime, date, timedelta
+import os
 import time
+from sheets import SheetStore
+from profiling import PROFILE_LOG, InstrumentedConnection, Profiler, append_log, breakdown
+from local_store import LocalMirror, MemoryOutbox, SyncWorker
+from partitions import LogPartitions
+from schedule import ScheduleIndex
+from charts import TREND_VIEWS, FigureCache, heatmap_figure, trend_figure
+from transfer import export_bytes, export_name, merge_logs, read_table, validate_logs
+from snapshot import load_snapshot, matches
+from schema import HABIT_KEYS, QUESTIONS, normalize_checklist
+from checklist import apply_ops, due_resets, last_reset_day, mark_reset, occurrences, pending_summary, reset_ops
+from scoring import StreakCache, history_log, lifetime_metrics, week_metrics
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="2026 Growth Tracker", page_icon="🚀", layout="wide")
@@ -28,15 +40,6 @@ AI_ROADMAP = {
     12: {"topic": "Capstone Project", "link": "https://github.com/"}
 }
 
-QUESTIONS = [
-    {"key": "Workout", "icon": "💪", "color": "red", "q": "Did you WORKOUT today?", "ask_detail": "What exercise?"},
-    {"key": "Code", "icon": "💻", "color": "blue", "q": "Did you CODE/AI today?", "ask_detail": "Topic studied?"},
-    {"key": "Read", "icon": "📚", "color": "orange", "q": "Did you READ 10 mins?", "ask_detail": "Book/Page?"},
-    {"key": "NoJunk", "icon": "🥦", "color": "green", "q": "Did you eat CLEAN?", "ask_detail": "What meal?"},
-    {"key": "Connect", "icon": "🤝", "color": "pink", "q": "Did you CONNECT?", "ask_detail": "Who?"},
-    {"key": "SideHustle", "icon": "🎥", "color": "violet", "q": "SIDE HUSTLE work?", "ask_detail": "Progress?"}
-]
-
 # --- IST TIMEZONE CALCULATOR ---
 def get_ist_date():
     utc_now = datetime.utcnow()
@@ -44,486 +47,620 @@ def get_ist_date():
     return ist_now.date()
 
 # --- DATABASE CONNECTION ---
-conn = st.connection("gsheets", type=GSheetsConnection)
+# Every Sheets read/update is timed into one process-wide profiler; each full
+# rerun reports the calls it made (see the ?debug=1 panel).
+@st.cache_resource
+def get_sheet_calls():
+    return Profiler()
+
+sheet_calls = get_sheet_calls()
+conn = InstrumentedConnection(st.connection("gsheets", type=GSheetsConnection), sheet_calls)
+
+# Writes never block the script: they land in an outbox that a background thread
+# pushes to Sheets with retries. Set TRACKER_LOCAL_STORE to a SQLite path to make
+# the outbox durable and serve reads from a local mirror.
+@st.cache_resource
+def get_sync(path):
+    mirror = LocalMirror(path) if path else MemoryOutbox()
+    worker = SyncWorker(mirror, conn)
+    worker.start()
+    return mirror, worker
+
+mirror, sync_worker = get_sync(os.environ.get("TRACKER_LOCAL_STORE"))
+
+# Parsed worksheets are shared by every session in the process: concurrent misses
+# on a sheet share one read, and this app's writes refresh the cache and bump its
+# version for all sessions (write-through). Everything else expires after
+# CACHE_MAX_AGE seconds.
+@st.cache_resource
+def get_store(path):
+    return SheetStore(conn, mirror=get_sync(path)[0])
+
+store = get_store(os.environ.get("TRACKER_LOCAL_STORE"))
+
+# Logs are split by ISO year. The dashboard works on the current year plus a short
+# tail of the previous one; older years are parsed only when browsed or first
+# rolled up, and stay cached until their rows change.
+@st.cache_resource
+def get_partitions():
+    return LogPartitions()
+
+partitions = get_partitions()
 
 def get_data():
     try:
-        conn.reset()
-        return conn.read(worksheet="Logs", usecols=list(range(16)), ttl=0)
+        partitions.refresh(store)
+        return partitions.window(today)
     except:
         return pd.DataFrame()
 
+# Date-keyed Schedule, shared by all sessions and rebuilt only when the sheet changes.
+@st.cache_resource
+def get_schedule_index():
+    return ScheduleIndex()
+
 def get_schedule():
-    try:
-        df_schedule = conn.read(worksheet="Schedule", usecols=[0, 1], ttl=0)
-        df_schedule.columns = ["Date", "Task"]
-        df_schedule["Date"] = pd.to_datetime(df_schedule["Date"]).dt.date
-        return df_schedule
-    except:
-        return pd.DataFrame()
+    schedule = get_schedule_index()
+    try: schedule.refresh(store)
+    except Exception: pass  # keep serving the last index (empty on a cold failure)
+    return schedule
 
 # --- CHECKLIST FUNCTIONS ---
 def get_checklist():
     try:
-        df = conn.read(worksheet="Checklist", usecols=[0, 1, 2, 3], ttl=0)
-        df["Last_Completed"] = df["Last_Completed"].astype(str)
-        return df
+        return normalize_checklist(store.read("Checklist"))
     except:
-        return pd.DataFrame(columns=["Task", "Tag", "Status", "Last_Completed"])
-
-def update_checklist(df):
-    conn.update(worksheet="Checklist", data=df)
-
+        return normalize_checklist(pd.DataFrame(columns=["Task", "Tag", "Status", "Last_Completed"]))
+
+def update_checklist(ops, day):
+    # Queued as the ops themselves and replayed on the sheet's latest Checklist,
+    # so other sessions' edits to other tasks are not overwritten.
+    store.patch("Checklist", ops, day)
+
+# Toggles, deletes and adds are queued in the session and written to the sheet
+# together, either from the sidebar's save button or CHECKLIST_DEBOUNCE seconds
+# after the last change.
+CHECKLIST_DEBOUNCE = 10
+
+def queue_checklist_change(op):
+    st.session_state.setdefault("checklist_pending", []).append(op)
+    st.session_state["checklist_changed_at"] = time.monotonic()
+
+def flush_checklist():
+    ops = st.session_state.get("checklist_pending")
+    if not ops: return
+    update_checklist(ops, get_ist_date())
+    st.session_state["checklist_pending"] = []
+    st.toast("Checklist saved", icon="☁️")
+
+def checklist_view():
+    return apply_ops(get_checklist(), st.session_state.get("checklist_pending"), today)
+
+# Ops name a task by its text plus which same-named row it is (see
+# checklist.occurrences); new tasks must have a name not already in use.
 def add_checklist_item(task, tag):
-    df = get_checklist()
-    new_row = pd.DataFrame([{"Task": task, "Tag": tag, "Status": 0, "Last_Completed": ""}])
-    updated_df = pd.concat([df, new_row], ignore_index=True)
-    update_checklist(updated_df)
+    if (checklist_view()["Task"] == task).any():
+        st.toast(f"Already on the list: {task}", icon="⚠️")
+        return
+    queue_checklist_change({"op": "add", "task": task, "tag": tag})
     st.toast(f"Added: {task}", icon="📌")
-    time.sleep(1)
-    st.rerun()
-
-def toggle_checklist_item(index, new_status):
-    df = get_checklist()
-    df.at[index, "Status"] = 1 if new_status else 0
-    if new_status:
-        df.at[index, "Last_Completed"] = str(get_ist_date())
-    update_checklist(df)
-    st.rerun()
-
-def delete_checklist_item(index):
-    df = get_checklist()
-    df = df.drop(index).reset_index(drop=True)
-    update_checklist(df)
-    st.rerun()
-
-def check_recurring_resets():
-    df = get_checklist()
-    if df.empty: return
-    today = get_ist_date()
-    current_week = today.isocalendar().week
-    current_month = today.month
-    data_changed = False
-    
-    for i, row in df.iterrows():
-        if row["Status"] == 1:
-            last_date_str = str(row["Last_Completed"])
-            if not last_date_str or last_date_str == "nan": continue
-            try:
-                last_date = datetime.strptime(last_date_str, "%Y-%m-%d").date()
-                if row["Tag"] == "Weekly":
-                    if last_date.isocalendar().week != current_week:
-                        df.at[i, "Status"] = 0
-                        data_changed = True
-                elif row["Tag"] == "Monthly":
-                    if last_date.month != current_month:
-                        df.at[i, "Status"] = 0
-                        data_changed = True
-            except: continue
-    if data_changed: update_checklist(df)
+
+def toggle_checklist_item(task, nth, key):
+    queue_checklist_change({"op": "toggle", "task": task, "nth": int(nth), "status": st.session_state[key]})
+
+def delete_checklist_item(task, nth):
+    queue_checklist_change({"op": "delete", "task": task, "nth": int(nth)})
+
+@st.fragment(run_every=CHECKLIST_DEBOUNCE)
+def checklist_sync():
+    ops = st.session_state.get("checklist_pending")
+    if not ops: return
+    if time.monotonic() - st.session_state.get("checklist_changed_at", 0) >= CHECKLIST_DEBOUNCE:
+        flush_checklist()
+        return
+    c1, c2 = st.columns([0.6, 0.4])
+    c1.caption(f"⏳ Unsaved: {pending_summary(ops)}")
+    if c2.button("💾 Save", key="flush_checklist"): flush_checklist()
+
+# Weekly/Monthly resets are evaluated in one vectorised pass at most once per IST
+# day; the last run is kept in RESET_MARKER so reruns and restarts skip it.
+RESET_MARKER = os.environ.get("TRACKER_RESET_MARKER", ".last_reset")
+
+def check_recurring_resets(df):
+    if df.empty or last_reset_day(RESET_MARKER) == today: return df
+    due = due_resets(df, today)
+    if due.any():
+        ops = reset_ops(df, due)
+        update_checklist(ops, today)
+        df = apply_ops(df, ops, today)
+    mark_reset(RESET_MARKER, today)
+    return df
 
 def update_data(df):
-    conn.update(worksheet="Logs", data=df)
+    store.write("Logs", df)
 
 # --- SAVE LOGIC ---
+# Saves only touch the local cache and the outbox, so they rerun straight away;
+# the confirmation is shown on the next run instead of sleeping for it.
+def flash(msg, icon, balloons=False):
+    st.session_state["flash"] = (msg, icon, balloons)
+
+def rerun(scope="app"):
+    # A fragment-scoped rerun is only valid during that fragment's own rerun;
+    # anything else (e.g. a full run after a widget outside it) reruns the app.
+    try: st.rerun(scope=scope)
+    except StreamlitAPIException: st.rerun()
+
+def show_flash():
+    if "flash" not in st.session_state: return
+    msg, icon, balloons = st.session_state.pop("flash")
+    if balloons: st.balloons()
+    st.toast(msg, icon=icon)
+
+@st.fragment(run_every=5)
+def sync_status():
+    pending = len(mirror.pending())
+    failed = mirror.failed()
+    if failed:
+        c1, c2 = st.columns([0.8, 0.2])
+        c1.caption(f"❌ {len(failed)} change(s) could not be saved: {failed[-1]['error']}")
+        if c2.button("Dismiss", key="dismiss_failed"): mirror.dismiss()
+    if sync_worker.last_error: st.caption(f"⚠️ {pending} pending, retrying: {sync_worker.last_error}")
+    elif pending: st.caption(f"⏳ Saving {pending} change(s)...")
+    else: st.caption("☁️ All changes synced")
+
+def blank_log_row():
+    row = {}
+    for q in QUESTIONS:
+        row[q["key"]] = 0
+        row[f"{q['key']}_Detail"] = ""
+    row["Next_Goal"] = ""
+    row["Reflection"] = ""
+    row["Weekly_Retro"] = ""
+    return row
+
 def save_partial_log(date_obj, key, val, detail):
-    df = get_data()
-    if not df.empty: df["Date"] = pd.to_datetime(df["Date"]).dt.date
-    if not df.empty and date_obj in df["Date"].values:
-        mask = df["Date"] == date_obj
-        df.loc[mask, key] = val
-        df.loc[mask, f"{key}_Detail"] = detail
-        final_df = df
-    else:
-        new_row = {"Date": date_obj}
-        for q in QUESTIONS:
-            new_row[q["key"]] = 0
-            new_row[f"{q['key']}_Detail"] = ""
-        new_row["Next_Goal"] = ""
-        new_row["Reflection"] = ""
-        new_row["Weekly_Retro"] = ""
-        new_row[key] = val
-        new_row[f"{key}_Detail"] = detail
-        new_df = pd.DataFrame([new_row])
-        final_df = pd.concat([df, new_df], ignore_index=True)
-    update_data(final_df)
-    today_row = final_df[final_df["Date"] == date_obj].iloc[0]
+    # Patches (or appends) only the row for date_obj; see SheetStore.upsert.
+    today_row = store.upsert("Logs", "Date", date_obj, {key: val, f"{key}_Detail": detail}, defaults=blank_log_row())
     total_done = sum([1 for q in QUESTIONS if today_row.get(q["key"], 0) == 1])
-    if total_done == 6:
-        st.balloons()
-        st.toast("🏆 PERFECTION!", icon="🎉")
-    else:
-        st.toast(f"Saved {key}!", icon="✅")
-    time.sleep(1)
-    st.rerun()
-
-def save_generic_text(date_obj, col_name, text):
-    df = get_data()
-    if not df.empty: df["Date"] = pd.to_datetime(df["Date"]).dt.date
-    if not df.empty and date_obj in df["Date"].values:
-        df.loc[df["Date"] == date_obj, col_name] = text
-        final_df = df
-    else:
-        new_row = {"Date": date_obj, col_name: text}
-        for q in QUESTIONS: new_row[q["key"]] = 0
-        final_df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-    update_data(final_df)
-    st.toast("Saved!", icon="💾")
-    time.sleep(1)
-    st.rerun()
+    if total_done == 6: flash("🏆 PERFECTION!", "🎉", balloons=True)
+    else: flash(f"Saved {key}!", "✅")
+    rerun("fragment" if date_obj == today else "app")
+
+def save_generic_text(date_obj, col_name, text, scope="app"):
+    store.upsert("Logs", "Date", date_obj, {col_name: text}, defaults=blank_log_row())
+    flash("Saved!", "💾")
+    rerun(scope if date_obj == today else "app")
 
 # --- APP START ---
+# Section timings for this run; fragment reruns add to the last full run's profile.
+prof = Profiler()
+sheet_calls_start = sheet_calls.snapshot()
+run_started = time.perf_counter()
+
 today = get_ist_date()
 current_month = today.month
-check_recurring_resets()
-df = get_data()
+# Cold loads fetch every worksheet in parallel; every getter after this reads
+# from the shared cache.
+with prof.phase("prefetch"): store.prefetch(["Logs", "Checklist", "Schedule"])
+with prof.phase("resets"): check_recurring_resets(get_checklist())
+with prof.phase("load"):
+    get_data()  # re-splits Logs into year partitions only when the sheet changed
+    schedule = get_schedule()
+
+# get_data() is typed and indexed by date, so a day's row is a direct lookup.
+def log_row(logs, day):
+    ts = pd.Timestamp(day)
+    if logs.empty or ts not in logs.index: return None
+    return logs.loc[[ts]].iloc[0]
 
 # 1. STREAK
-streak = 0
-if not df.empty:
-    df["Date"] = pd.to_datetime(df["Date"]).dt.date
-    df = df.sort_values("Date", ascending=False)
-    habit_keys = [q["key"] for q in QUESTIONS if q["key"] in df.columns]
-    df["Any_Done"] = df[habit_keys].sum(axis=1) > 0
-    active_dates = df[df["Any_Done"]]["Date"].unique()
-    check_date = today
-    if check_date not in active_dates: check_date = today - timedelta(days=1)
-    while check_date in active_dates:
-        streak += 1
-        check_date -= timedelta(days=1)
+# Streaks span every year, so the full history is only assembled when Logs changed.
+# Metrics precomputed by snapshot.py (see TRACKER_SNAPSHOT) are shown as long as
+# they were built for today from exactly the Logs now cached; any save or sheet
+# change falls back to computing them here.
+SNAPSHOT_PATH = os.environ.get("TRACKER_SNAPSHOT")
+
+@st.cache_resource(max_entries=1)
+def get_snapshot(path, mtime):
+    return load_snapshot(path)
+
+def current_snapshot():
+    if not SNAPSHOT_PATH or not os.path.exists(SNAPSHOT_PATH): return None
+    snap = get_snapshot(SNAPSHOT_PATH, os.path.getmtime(SNAPSHOT_PATH))
+    return snap if matches(snap, partitions, today) else None
+
+def streak_stats():
+    if not partitions.years(): return {"current": 0, "longest": 0, "habits": {}}
+    snap = current_snapshot()
+    if snap: return snap["streak"]
+    if "streak_cache" not in st.session_state: st.session_state["streak_cache"] = StreakCache()
+    cache = st.session_state["streak_cache"]
+    with prof.phase("streaks"):
+        if cache.version == (partitions.version, today): return cache.result
+        return cache.get(partitions.history(), today, HABIT_KEYS, partitions.version)
+
+# The sidebar, the daily dashboard and the recurring-tasks panel are fragments:
+# a save or checkbox in one of them reruns only that part, against the shared
+# cache, without the prefetch, resets or analytics of a full run.
 
 # --- SIDEBAR: BUYING LIST ---
-with st.sidebar:
+@st.fragment
+def buying_list():
     st.title("🛒 Buying List")
     with st.form("shopping_form"):
         shop_item = st.text_input("Item Name")
         if st.form_submit_button("Add"):
             if shop_item: add_checklist_item(shop_item, "Shopping")
     st.divider()
-    checklist_df = get_checklist()
-    if not checklist_df.empty:
-        shopping_list = checklist_df[checklist_df["Tag"] == "Shopping"]
+    shop_view = checklist_view()
+    nth = occurrences(shop_view)
+    if not shop_view.empty:
+        shopping_list = shop_view[shop_view["Tag"] == "Shopping"]
         if not shopping_list.empty:
             for i, row in shopping_list.iterrows():
                 c1, c2 = st.columns([0.8, 0.2])
                 is_checked = bool(row["Status"] == 1)
-                with c1:
-                    if st.checkbox(f"{row['Task']}", value=is_checked, key=f"shop_{i}"):
-                        if not is_checked: toggle_checklist_item(i, True)
-                    else:
-                        if is_checked: toggle_checklist_item(i, False)
-                with c2:
-                    if st.button("🗑️", key=f"del_shop_{i}"): delete_checklist_item(i)
+                item_key = f"shop_{i}_{row['Task']}"
+                with c1: st.checkbox(f"{row['Task']}", value=is_checked, key=item_key, on_change=toggle_checklist_item, args=(row["Task"], nth[i], item_key))
+                with c2: st.button("🗑️", key=f"del_{item_key}", on_click=delete_checklist_item, args=(row["Task"], nth[i]))
         else: st.caption("Cart empty.")
-
-# 2. HEADER
-c_title, c_streak = st.columns([3, 1])
-with c_title:
-    st.title("🚀 2026 Growth Tracker")
-    st.caption(f"📅 {today.strftime('%A, %d %B %Y')} (IST)")
-with c_streak:
-    st.metric("Current Streak", f"🔥 {streak} Days")
-
-# 3. SMART MENTOR
-schedule_df = get_schedule()
-todays_task = "No specific task assigned."
-task_found = False
-if not schedule_df.empty:
-    task_row = schedule_df[schedule_df["Date"] == today]
-    if not task_row.empty:
-        todays_task = task_row.iloc[0]["Task"]
+    checklist_sync()
+
+with st.sidebar, prof.phase("sidebar"):
+    buying_list()
+
+@st.fragment
+def daily_dashboard():
+    logs = get_data()
+    # Fragment reruns keep the full run's `today`; the header and saves follow
+    # the IST clock instead, so a save just after midnight lands on the new day.
+    day = get_ist_date()
+    show_flash()
+    streak_info = streak_stats()
+    habit_streaks = streak_info["habits"]
+
+    # 2. HEADER
+    c_title, c_streak = st.columns([3, 1])
+    with c_title:
+        st.title("🚀 2026 Growth Tracker")
+        st.caption(f"📅 {day.strftime('%A, %d %B %Y')} (IST)")
+        sync_status()
+    with c_streak:
+        st.metric("Current Streak", f"🔥 {streak_info['current']} Days", f"Best: {streak_info['longest']}", delta_color="off")
+
+    # 3. SMART MENTOR
+    todays_task = "No specific task assigned."
+    task_found = False
+    todays_tasks = schedule.on(day)
+    if todays_tasks:
+        todays_task = todays_tasks[0]
         task_found = True
 
-if task_found: st.info(f"📅 **TODAY'S MISSION:** {todays_task}")
-
-with st.expander("🗺️ View Full AI Roadmap (Click to Expand)", expanded=False):
-    st.markdown("### 📅 Yearly Plan")
-    for m in range(1, 13):
-        data = AI_ROADMAP.get(m, {"topic": "TBD", "link": "#"})
-        prefix = "👉" if m == current_month else "🔹"
-        style = "**" if m == current_month else ""
-        st.markdown(f"{prefix} {style}Month {m}: [{data['topic']}]({data['link']}){style}")
-
-# 4. STATUS & GIF
-today_progress = 0
-today_reflection = ""
-if not df.empty and today in df["Date"].values:
-    row = df[df["Date"] == today].iloc[0]
-    def clean_bool(val):
-        try: return 1 if float(val) > 0 else 0
-        except: return 1 if str(val).upper() in ["TRUE", "T", "YES", "ON"] else 0
-    today_progress = sum([1 for q in QUESTIONS if clean_bool(row.get(q["key"], 0)) == 1])
-    today_reflection = row.get("Reflection", "") if pd.notna(row.get("Reflection", "")) else ""
-
-if today_progress >= 4:
-    current_gif = GIF_HIGH
-    status_msg = f"🔥 **BEAST MODE!** ({today_progress}/6)"
-elif today_progress == 3:
-    current_gif = GIF_MID
-    status_msg = f"⚔️ **MOMENTUM...** ({today_progress}/6)"
-else:
-    current_gif = GIF_LOW
-    status_msg = f"🌱 **WARMING UP...** ({today_progress}/6)"
-
-c1, c2 = st.columns([1, 4])
-with c1: st.image(current_gif, use_container_width=True)
-with c2:
-    st.success(status_msg)
-    cg1, cg2 = st.columns(2)
-    today_goal_msg = "No goal set."
-    if not df.empty:
-        yest = today - timedelta(days=1)
-        y_row = df[df["Date"] == yest]
-        if not y_row.empty and "Next_Goal" in y_row.columns:
-            g = y_row.iloc[0]["Next_Goal"]
-            if pd.notna(g) and str(g).strip(): today_goal_msg = f"🔮 **Target:** {g}"
+    if task_found: st.info(f"📅 **TODAY'S MISSION:** {todays_task}")
+
+    upcoming = schedule.upcoming(day + timedelta(days=1), days=7)
+    if upcoming:
+        with st.expander("🗓️ Next 7 Days", expanded=False):
+            for when, tasks in upcoming:
+                st.markdown(f"**{when.strftime('%a %d %b')}:** {' · '.join(tasks)}")
+
+    with st.expander("🗺️ View Full AI Roadmap (Click to Expand)", expanded=False):
+        st.markdown("### 📅 Yearly Plan")
+        for m in range(1, 13):
+            data = AI_ROADMAP.get(m, {"topic": "TBD", "link": "#"})
+            prefix = "👉" if m == current_month else "🔹"
+            style = "**" if m == current_month else ""
+            st.markdown(f"{prefix} {style}Month {m}: [{data['topic']}]({data['link']}){style}")
+
+    # 4. STATUS & GIF
+    today_progress = 0
+    today_reflection = ""
+    row = log_row(logs, day)
+    if row is not None:
+        today_progress = int(row[HABIT_KEYS].sum())
+        today_reflection = row["Reflection"]
+
+    if today_progress >= 4:
+        current_gif = GIF_HIGH
+        status_msg = f"🔥 **BEAST MODE!** ({today_progress}/6)"
+    elif today_progress == 3:
+        current_gif = GIF_MID
+        status_msg = f"⚔️ **MOMENTUM...** ({today_progress}/6)"
+    else:
+        current_gif = GIF_LOW
+        status_msg = f"🌱 **WARMING UP...** ({today_progress}/6)"
+
+    c1, c2 = st.columns([1, 4])
+    with c1: st.image(current_gif, use_container_width=True)
+    with c2:
+        st.success(status_msg)
+        cg1, cg2 = st.columns(2)
+        today_goal_msg = "No goal set."
+        y_row = log_row(logs, day - timedelta(days=1))
+        if y_row is not None:
+            g = y_row["Next_Goal"]
+            if str(g).strip(): today_goal_msg = f"🔮 **Target:** {g}"
     
-    with cg1:
-        st.write(today_goal_msg)
-        with st.popover("Set Tomorrow's Goal"):
-            new_g = st.text_input("One Goal:")
-            if st.button("Commit Goal"): save_generic_text(today, "Next_Goal", new_g)
-    with cg2:
-        if today_reflection: st.caption(f"📝 {today_reflection}")
-        else: st.caption("📝 No reflection yet.")
-        with st.popover("Add Note"):
-            new_r = st.text_area("Note:", value=today_reflection)
-            if st.button("Save Note"): save_generic_text(today, "Reflection", new_r)
-
-st.divider()
-
-# --- 5. CONTROL CENTER (EXPANDER) ---
-with st.expander("📝 Daily Control Center (Click to Open)", expanded=False):
-    today_data = {}
-    if not df.empty and today in df["Date"].values:
-        r = df[df["Date"] == today].iloc[0]
-        for q in QUESTIONS:
-            k = q["key"]
-            val = clean_bool(r.get(k, 0))
-            det = r.get(f"{k}_Detail", "")
-            today_data[k] = {"done": val == 1, "detail": det}
-
-    cols = st.columns(3) + st.columns(3)
-    for idx, q in enumerate(QUESTIONS):
-        key = q["key"]
-        stat = today_data.get(key, {"done": False, "detail": ""})
-        # NOTE: Changed from Expander to Container to allow parent Expander
-        with cols[idx]:
-            with st.container(border=True):
-                # Header Line
-                st.markdown(f"**{q['icon']} {key}**")
-                if key == "Code" and task_found:
-                    st.info(f"🎯 {todays_task}")
-                    if not stat["detail"]: stat["detail"] = f"Studied: {todays_task}"
+        with cg1:
+            st.write(today_goal_msg)
+            with st.popover("Set Tomorrow's Goal"):
+                new_g = st.text_input("One Goal:")
+                if st.button("Commit Goal"): save_generic_text(day, "Next_Goal", new_g, scope="fragment")
+        with cg2:
+            if today_reflection: st.caption(f"📝 {today_reflection}")
+            else: st.caption("📝 No reflection yet.")
+            with st.popover("Add Note"):
+                new_r = st.text_area("Note:", value=today_reflection)
+                if st.button("Save Note"): save_generic_text(day, "Reflection", new_r, scope="fragment")
+
+    st.divider()
+
+    # --- 5. CONTROL CENTER (EXPANDER) ---
+    with st.expander("📝 Daily Control Center (Click to Open)", expanded=False):
+        today_data = {}
+        r = log_row(logs, day)
+        if r is not None:
+            for k in HABIT_KEYS:
+                today_data[k] = {"done": r[k] == 1, "detail": r[f"{k}_Detail"]}
+
+        cols = st.columns(3) + st.columns(3)
+        for idx, q in enumerate(QUESTIONS):
+            key = q["key"]
+            stat = today_data.get(key, {"done": False, "detail": ""})
+            # NOTE: Changed from Expander to Container to allow parent Expander
+            with cols[idx]:
+                with st.container(border=True):
+                    # Header Line
+                    st.markdown(f"**{q['icon']} {key}**")
+                    if habit_streaks.get(key, {}).get("current"): st.caption(f"🔥 {habit_streaks[key]['current']} day streak")
+                    if key == "Code" and task_found:
+                        st.info(f"🎯 {todays_task}")
+                        if not stat["detail"]: stat["detail"] = f"Studied: {todays_task}"
                 
-                with st.form(f"f_{key}"):
-                    chk = st.checkbox("Done?", value=stat["done"])
-                    det = st.text_input(q["ask_detail"], value=str(stat["detail"]) if pd.notna(stat["detail"]) else "")
-                    if st.form_submit_button("Save"):
-                        if chk and not det.strip(): st.error("Detail needed!")
-                        else: save_partial_log(today, key, 1 if chk else 0, det)
+                    with st.form(f"f_{key}"):
+                        chk = st.checkbox("Done?", value=stat["done"])
+                        det = st.text_input(q["ask_detail"], value=str(stat["detail"]))
+                        if st.form_submit_button("Save"):
+                            if chk and not det.strip(): st.error("Detail needed!")
+                            else: save_partial_log(day, key, 1 if chk else 0, det)
+
+with prof.phase("dashboard"): daily_dashboard()
 
 # --- 📌 RECURRING TASKS (EXPANDER) ---
-with st.expander("📌 Recurring Tasks (Click to Open)", expanded=False):
-    col_check_1, col_check_2 = st.columns([1, 2])
-
-    with col_check_1:
-        with st.form("add_checklist_form"):
-            st.markdown("**Add Recurring Task**")
-            new_task_name = st.text_input("Task Name")
-            new_task_tag = st.selectbox("Frequency", ["Weekly", "Monthly", "One-off"])
-            if st.form_submit_button("Add Task"):
-                if new_task_name: add_checklist_item(new_task_name, new_task_tag)
-                else: st.error("Name required!")
-
-    with col_check_2:
-        if not checklist_df.empty:
-            main_tasks = checklist_df[checklist_df["Tag"] != "Shopping"]
-            if not main_tasks.empty:
-                for i, row in main_tasks.iterrows():
-                    with st.container():
-                        c1, c2, c3, c4 = st.columns([0.1, 0.6, 0.2, 0.1])
-                        is_checked = bool(row["Status"] == 1)
-                        with c1:
-                            if st.checkbox("Done", value=is_checked, key=f"main_{i}", label_visibility="collapsed"):
-                                if not is_checked: toggle_checklist_item(i, True)
-                            else:
-                                if is_checked: toggle_checklist_item(i, False)
-                        with c2:
-                            if is_checked: st.markdown(f"~~{row['Task']}~~")
-                            else: st.markdown(f"**{row['Task']}**")
-                        with c3: st.caption(f"_{row['Tag']}_")
-                        with c4:
-                            if st.button("🗑️", key=f"del_main_{i}"): delete_checklist_item(i)
-                        st.divider()
-            else: st.info("No recurring tasks set.")
+@st.fragment
+def recurring_tasks():
+    with st.expander("📌 Recurring Tasks (Click to Open)", expanded=False):
+        col_check_1, col_check_2 = st.columns([1, 2])
+
+        with col_check_1:
+            with st.form("add_checklist_form"):
+                st.markdown("**Add Recurring Task**")
+                new_task_name = st.text_input("Task Name")
+                new_task_tag = st.selectbox("Frequency", ["Weekly", "Monthly", "One-off"])
+                if st.form_submit_button("Add Task"):
+                    if new_task_name: add_checklist_item(new_task_name, new_task_tag)
+                    else: st.error("Name required!")
+
+        with col_check_2:
+            main_view = checklist_view()
+            nth = occurrences(main_view)
+            if not main_view.empty:
+                main_tasks = main_view[main_view["Tag"] != "Shopping"]
+                if not main_tasks.empty:
+                    for i, row in main_tasks.iterrows():
+                        with st.container():
+                            c1, c2, c3, c4 = st.columns([0.1, 0.6, 0.2, 0.1])
+                            is_checked = bool(row["Status"] == 1)
+                            item_key = f"main_{i}_{row['Task']}"
+                            with c1: st.checkbox("Done", value=is_checked, key=item_key, label_visibility="collapsed", on_change=toggle_checklist_item, args=(row["Task"], nth[i], item_key))
+                            with c2:
+                                if is_checked: st.markdown(f"~~{row['Task']}~~")
+                                else: st.markdown(f"**{row['Task']}**")
+                            with c3: st.caption(f"_{row['Tag']}_")
+                            with c4:
+                                st.button("🗑️", key=f"del_{item_key}", on_click=delete_checklist_item, args=(row["Task"], nth[i]))
+                            st.divider()
+                else: st.info("No recurring tasks set.")
+
+with prof.phase("recurring"): recurring_tasks()
 
 # 6. ANALYTICS (EXPANDER)
-if not df.empty:
-    st.divider()
-    with st.expander("📊 Analytics & History (Click to Open)", expanded=False):
-        # ... (Keep existing Analytics Logic logic here) ...
-        df["Date_Obj"] = pd.to_datetime(df["Date"])
-        df["Week_Num"] = df["Date_Obj"].dt.isocalendar().week
-        df["Year"] = df["Date_Obj"].dt.isocalendar().year
-        
-        daily_habits = ["Workout", "Code", "Read", "NoJunk", "SideHustle"]
-        weekly_habit = "Connect"
-        
-        curr_week = today.isocalendar().week
-        curr_year = today.isocalendar().year
-        this_week_df = df[(df["Week_Num"] == curr_week) & (df["Year"] == curr_year)]
-        
-        cur_daily = this_week_df[daily_habits].sum().sum()
-        cur_connect = 1 if this_week_df[weekly_habit].sum() >= 1 else 0
-        cur_total = cur_daily + cur_connect
-        cur_possible = 31
-        cur_pct = 0
-        if cur_possible > 0: cur_pct = int((cur_total / cur_possible) * 100)
-        
-        cur_reward = 0
-        if cur_pct > 50:
-            cur_reward = int(cur_pct) * 5
-            reward_status = "🔓 UNLOCKED!"
-            delta_color = "normal"
-        else:
-            reward_status = "❌ Locked"
-            delta_color = "off"
+# Nothing below runs until the panel is opened, each tab only builds its own
+# content while it is the open tab, and plotly is imported on the first chart.
+# Charts and raw data show one ISO year at a time (the current one by default).
+# Finished figures are shared across sessions and reused until that year's rows
+# change, so switching views or rerunning after an unrelated save rebuilds nothing.
+@st.cache_resource
+def get_figures():
+    return FigureCache()
+
+def render_trend_chart(year):
+    view_mode = st.radio("View:", TREND_VIEWS, horizontal=True)
+    fig_chart = get_figures().get(("trend", view_mode, year), partitions.key(year), lambda: trend_figure(view_mode, partitions.frame(year)))
+    st.plotly_chart(fig_chart, use_container_width=True)
+
+def render_heatmap(year):
+    fig_heat = get_figures().get(("heatmap", year), partitions.key(year), lambda: heatmap_figure(partitions.frame(year)))
+    st.plotly_chart(fig_heat, use_container_width=True)
+
+# Long lists render one page at a time, so their cost stays bounded however many
+# weeks or days have been logged.
+LEDGER_PAGE_SIZE = 10
+RAW_PAGE_SIZE = 50
+
+def pager(total, size, key):
+    # Row range [start, stop) of the chosen page; the picker only shows when
+    # there is more than one page.
+    pages = max(1, -(-total // size))
+    if st.session_state.get(key, 1) > pages: st.session_state[key] = pages
+    # Passing value= as well as setting the key in session_state makes Streamlit warn.
+    initial = {} if key in st.session_state else {"value": 1}
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key=key, **initial) if pages > 1 else 1
+    start = (page - 1) * size
+    return start, min(start + size, total)
+
+def render_review(week, total_historical_jackpot, rollup):
+    is_sunday = today.weekday() == 6
+    retro_title = "📝 Weekly Review (Unlock on Sunday)"
+    if is_sunday: retro_title = "📝 Weekly Review (Open Now!)"
+    st.markdown(f"#### {retro_title}")
+    
+    if is_sunday:
+        missed_msg = ", ".join(week["missed"]) if week["missed"] else "None! (Great Job)"
+        st.markdown(f"**Reviewing Week {week['week']}** (Progress: {week['pct']}%)")
+        st.warning(f"⚠️ **Focus Area:** You missed **{missed_msg}** most this week.")
         
-        today_idx = today.weekday()
-        if today_idx == 6: days_msg = "Week Over"
-        else: days_msg = f"⏳ {5 - today_idx} Days Left"
+        with st.form("weekly_retro_form"):
+            q1 = st.text_input("1. 🏆 Big Win:", placeholder="e.g. Hit all workouts")
+            q2 = st.text_input("2. 📉 Big Miss:", placeholder="e.g. Procrastinated coding")
+            q3 = st.text_input("3. 🧐 Why it happened?", placeholder="e.g. Stayed up too late")
+            q4 = st.text_input("4. 🛠️ The Fix:", placeholder="e.g. Phone off at 10pm")
+            q5 = st.slider("5. 🔥 Commitment for Next Week?", 1, 10, 8)
+            if st.form_submit_button("Save Weekly Review"):
+                full_review = f"{q1}|{q2}|{q3}|{q4}|{q5}"
+                save_generic_text(today, "Weekly_Retro", full_review)
+    else:
+        st.info("🔒 This form is locked until Sunday. Focus on your daily tasks for now!")
+    
+    st.divider()
+    st.markdown("### 📜 Past Reviews & Ledger")
+    st.metric("Total Career Earnings", f"{total_historical_jackpot} Pts")
+    
+    if len(rollup):
+        start, stop = pager(len(rollup), LEDGER_PAGE_SIZE, "ledger_page")
+        for entry in history_log(rollup, start, stop):
+            with st.container():
+                c_head, c_pts = st.columns([3, 1])
+                c_head.markdown(f"#### **{entry['Week']}** - {entry['Status']}")
+                c_pts.metric("Pts", entry['Points'])
+                
+                raw_retro = entry['Retrospective']
+                if raw_retro and "|" in raw_retro:
+                    parts = raw_retro.split("|")
+                    if len(parts) >= 4:
+                        st.markdown(f"- 🏆 **Win:** {parts[0]}\n- 📉 **Miss:** {parts[1]}\n- 🧐 **Why:** {parts[2]}\n- 🛠️ **Fix:** {parts[3]}\n- 🔥 **Commitment:** {parts[4]}/10")
+                    else: st.text(f"📝 Note: {raw_retro}")
+                elif raw_retro: st.text(f"📝 Note: {raw_retro}")
+                else: st.caption("No review submitted.")
+                st.divider()
+    else:
+        st.info("No history yet.")
+
+def render_raw_data(year):
+    # Filters first, then loads only the ISO years the date range touches and
+    # ships one page of rows to the browser.
+    shown = partitions.frame(year)
+    dates = st.date_input("Dates:", value=(shown["Date"].min().date(), shown["Date"].max().date()), key="raw_dates")
+    start, end = (dates[0], dates[-1]) if dates else (shown["Date"].min().date(), shown["Date"].max().date())
+    habits = st.multiselect("Done all of:", HABIT_KEYS, key="raw_habits")
+
+    years = [y for y in partitions.years() if start.isocalendar()[0] <= y <= end.isocalendar()[0]]
+    rows = partitions.history(years)
+    mask = (rows["Date"] >= pd.Timestamp(start)) & (rows["Date"] <= pd.Timestamp(end))
+    for h in habits: mask &= rows[h] == 1
+    rows = rows[mask]
+
+    first, last = pager(len(rows), RAW_PAGE_SIZE, "raw_page")
+    st.caption(f"Rows {first + 1 if len(rows) else 0}–{last} of {len(rows)}")
+    st.dataframe(rows.iloc[::-1].iloc[first:last], hide_index=True)
+
+# Backups are serialised only when a download is clicked; an import is
+# validated against the Logs schema, previewed, and committed as one sheet write.
+def render_transfer():
+    st.markdown("**⬇️ Export**")
+    logs_raw, checklist_raw = store.read("Logs"), store.read("Checklist")
+    c1, c2, c3 = st.columns(3)
+    c1.download_button("Logs (CSV)", lambda: export_bytes(logs_raw), export_name("Logs", today), "text/csv", key="export_logs_csv")
+    c2.download_button("Logs (Parquet)", lambda: export_bytes(logs_raw, "parquet"), export_name("Logs", today, "parquet"), "application/octet-stream", key="export_logs_parquet")
+    c3.download_button("Checklist (CSV)", lambda: export_bytes(checklist_raw), export_name("Checklist", today), "text/csv", key="export_checklist_csv")
+
+    st.markdown("**⬆️ Import Logs**")
+    upload = st.file_uploader("CSV or Parquet with a Date column", type=["csv", "parquet"], key="logs_import")
+    if upload is None: return
+    try:
+        incoming, errors = validate_logs(read_table(upload))
+    except Exception as e:
+        st.error(f"Could not read {upload.name}: {e}")
+        return
+    if errors:
+        for err in errors: st.error(err)
+        return
+    merged, counts = merge_logs(logs_raw, incoming)
+    st.caption(f"{counts['updated']} day(s) will be updated and {counts['added']} added.")
+    if st.button("Import", key="confirm_import", type="primary"):
+        update_data(merged)
+        flash(f"Imported {len(incoming)} day(s)!", "📥")
+        rerun()
+
+def render_analytics():
+    # Weekly totals come from the rollup; after a save only this ISO week is regrouped.
+    snap = current_snapshot()
+    if snap:
+        week, lifetime = snap["week"], snap["lifetime"]
+    else:
+        with prof.phase("rollup"):
+            rollup = partitions.rollup(today)
+        week, lifetime = week_metrics(rollup, today), lifetime_metrics(rollup)
+    if week["reward"]:
+        reward_status = "🔓 UNLOCKED!"
+        delta_color = "normal"
+    else:
+        reward_status = "❌ Locked"
+        delta_color = "off"
 
-        habit_counts = this_week_df[daily_habits].sum().sort_values()
-        missed_habits = habit_counts.head(2).index.tolist()
-        missed_msg = ", ".join(missed_habits) if missed_habits else "None! (Great Job)"
+    today_idx = today.weekday()
+    if today_idx == 6: days_msg = "Week Over"
+    else: days_msg = f"⏳ {5 - today_idx} Days Left"
 
-        history_groups = df.groupby(["Year", "Week_Num"])
-        total_historical_jackpot = 0
-        history_log = [] 
-        
-        for (h_year, h_week), group in history_groups:
-            h_daily = group[daily_habits].sum().sum()
-            h_connect = 1 if group[weekly_habit].sum() >= 1 else 0
-            h_total = h_daily + h_connect
-            h_pct = int((h_total / 31) * 100)
-            
-            retro_note = ""
-            if "Weekly_Retro" in group.columns:
-                retro_list = group[group["Weekly_Retro"].notna() & (group["Weekly_Retro"] != "")]["Weekly_Retro"].tolist()
-                if retro_list: retro_note = retro_list[-1]
-            
-            pts = 0
-            status = "❌ Missed"
-            if h_pct > 50:
-                pts = h_pct * 5
-                total_historical_jackpot += pts
-                status = "🏆 WON"
-                
-            history_log.append({
-                "Week": f"{h_year}-W{h_week}",
-                "Tasks Done": int(h_total),
-                "Completion": f"{h_pct}%",
-                "Points": pts,
-                "Status": status,
-                "Retrospective": retro_note
-            })
-
-        raw_xp = df[daily_habits + [weekly_habit]].sum().sum() * 10
-        final_lifetime_score = raw_xp + total_historical_jackpot
-        d_score = 0
-        if len(this_week_df) > 0:
-            total_daily_slots = len(this_week_df) * 5
-            if total_daily_slots > 0: d_score = int((cur_daily / total_daily_slots) * 100)
-
-        m1, m2 = st.columns(2)
-        m3, m4 = st.columns(2)
-        m1.metric("Weekly Progress", f"{cur_pct}%", f"{int(cur_total)}/31 Tasks")
-        m2.metric("Weekly Jackpot", f"{cur_reward} Pts", f"{reward_status} | {days_msg}", delta_color=delta_color)
-        m3.metric("Lifetime Score", f"{final_lifetime_score}", "XP")
-        m4.metric("Daily Consistency", f"{d_score}%", "Excl. Connect")
-
-        st.divider()
-        st.subheader("📈 Trends & Consistency")
-        tab1, tab2, tab3 = st.tabs(["📊 Charts", "🔥 Heatmap", "🏆 Jackpot & Review"])
-        
-        plot_df = df.copy()
-        all_keys = daily_habits + [weekly_habit]
-        if all_keys: plot_df["Total_Score"] = plot_df[all_keys].sum(axis=1)
-
-        with tab1:
-            view_mode = st.radio("View:", ["Daily Trend", "Weekly Progress", "Monthly Summary"], horizontal=True)
-            if view_mode == "Daily Trend":
-                fig_chart = px.bar(plot_df, x="Date", y="Total_Score", color="Total_Score", color_continuous_scale="Blues")
-            elif view_mode == "Weekly Progress":
-                weekly_df = plot_df.groupby("Week_Num")["Total_Score"].sum().reset_index()
-                fig_chart = px.bar(weekly_df, x="Week_Num", y="Total_Score", color="Total_Score", color_continuous_scale="Greens", text="Total_Score")
-            elif view_mode == "Monthly Summary":
-                plot_df["Month_Name"] = plot_df["Date_Obj"].dt.month_name()
-                plot_df["Month_Idx"] = plot_df["Date_Obj"].dt.month
-                monthly_df = plot_df.groupby(["Month_Name", "Month_Idx"])["Total_Score"].sum().reset_index().sort_values("Month_Idx")
-                fig_chart = px.bar(monthly_df, x="Month_Name", y="Total_Score", color="Total_Score", color_continuous_scale="Reds", text="Total_Score")
-            st.plotly_chart(fig_chart, use_container_width=True)
-
-        with tab2:
-            heat_data = plot_df.copy()
-            heat_data["Day"] = heat_data["Date_Obj"].dt.day_name()
-            fig_heat = px.density_heatmap(
-                heat_data, x="Week_Num", y="Day", z="Total_Score", nbinsx=52, 
-                color_continuous_scale="Greens",
-                category_orders={"Day": ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]}
-            )
-            st.plotly_chart(fig_heat, use_container_width=True)
-            
-        with tab3:
-            is_sunday = today.weekday() == 6
-            retro_title = "📝 Weekly Review (Unlock on Sunday)"
-            if is_sunday: retro_title = "📝 Weekly Review (Open Now!)"
-            st.markdown(f"#### {retro_title}")
-            
-            if is_sunday:
-                st.markdown(f"**Reviewing Week {curr_week}** (Progress: {cur_pct}%)")
-                st.warning(f"⚠️ **Focus Area:** You missed **{missed_msg}** most this week.")
-                
-                with st.form("weekly_retro_form"):
-                    q1 = st.text_input("1. 🏆 Big Win:", placeholder="e.g. Hit all workouts")
-                    q2 = st.text_input("2. 📉 Big Miss:", placeholder="e.g. Procrastinated coding")
-                    q3 = st.text_input("3. 🧐 Why it happened?", placeholder="e.g. Stayed up too late")
-                    q4 = st.text_input("4. 🛠️ The Fix:", placeholder="e.g. Phone off at 10pm")
-                    q5 = st.slider("5. 🔥 Commitment for Next Week?", 1, 10, 8)
-                    if st.form_submit_button("Save Weekly Review"):
-                        full_review = f"{q1}|{q2}|{q3}|{q4}|{q5}"
-                        save_generic_text(today, "Weekly_Retro", full_review)
-            else:
-                st.info("🔒 This form is locked until Sunday. Focus on your daily tasks for now!")
-            
+    m1, m2 = st.columns(2)
+    m3, m4 = st.columns(2)
+    m1.metric("Weekly Progress", f"{week['pct']}%", f"{week['total']}/31 Tasks")
+    m2.metric("Weekly Jackpot", f"{week['reward']} Pts", f"{reward_status} | {days_msg}", delta_color=delta_color)
+    m3.metric("Lifetime Score", f"{lifetime['score']}", "XP")
+    m4.metric("Daily Consistency", f"{week['consistency']}%", "Excl. Connect")
+
+    st.divider()
+    st.subheader("📈 Trends & Consistency")
+    view_year = st.selectbox("📅 Year", partitions.years()[::-1], key="analytics_year")
+    tab1, tab2, tab3 = st.tabs(["📊 Charts", "🔥 Heatmap", "🏆 Jackpot & Review"], key="analytics_tab", on_change="rerun")
+
+    with tab1:
+        if tab1.open:
+            with prof.phase("trend_chart"): render_trend_chart(view_year)
+
+    with tab2:
+        if tab2.open:
+            with prof.phase("heatmap"): render_heatmap(view_year)
+
+    with tab3:
+        if tab3.open:
+            with prof.phase("review"): render_review(week, lifetime["jackpot"], partitions.rollup(today))
+
+    with st.popover("🔐 View Raw Data (PIN Required)"):
+        pin = st.text_input("Enter PIN:", type="password", key="history_pin")
+        if pin == "1234":
+            render_raw_data(view_year)
             st.divider()
-            st.markdown("### 📜 Past Reviews & Ledger")
-            st.metric("Total Career Earnings", f"{total_historical_jackpot} Pts")
-            
-            if history_log:
-                history_log.sort(key=lambda x: x['Week'], reverse=True)
-                for entry in history_log:
-                    with st.container():
-                        c_head, c_pts = st.columns([3, 1])
-                        c_head.markdown(f"#### **{entry['Week']}** - {entry['Status']}")
-                        c_pts.metric("Pts", entry['Points'])
-                        
-                        raw_retro = entry['Retrospective']
-                        if raw_retro and "|" in raw_retro:
-                            parts = raw_retro.split("|")
-                            if len(parts) >= 4:
-                                st.markdown(f"- 🏆 **Win:** {parts[0]}\n- 📉 **Miss:** {parts[1]}\n- 🧐 **Why:** {parts[2]}\n- 🛠️ **Fix:** {parts[3]}\n- 🔥 **Commitment:** {parts[4]}/10")
-                            else: st.text(f"📝 Note: {raw_retro}")
-                        elif raw_retro: st.text(f"📝 Note: {raw_retro}")
-                        else: st.caption("No review submitted.")
-                        st.divider()
-            else:
-                st.info("No history yet.")
-
-        with st.popover("🔐 View Raw Data (PIN Required)"):
-            pin = st.text_input("Enter PIN:", type="password", key="history_pin")
-            if pin == "1234":
-                st.dataframe(df.sort_values("Date", ascending=False))
-            elif pin:
-                st.error("🔒 Incorrect PIN")
+            render_transfer()
+        elif pin:
+            st.error("🔒 Incorrect PIN")
+
+if partitions.years():
+    st.divider()
+    analytics_panel = st.expander("📊 Analytics & History (Click to Open)", expanded=False, key="analytics_panel", on_change="rerun")
+    with analytics_panel:
+        if analytics_panel.open:
+            with prof.phase("analytics"): render_analytics()
+
+# --- PROFILE ---
+# Hidden per-run breakdown (append ?debug=1 to the URL): section timings plus the
+# Sheets calls this run made. TRACKER_PROFILE_LOG also appends each run as JSONL.
+prof.record("total", time.perf_counter() - run_started)
+run_profile = {**prof.snapshot(), **sheet_calls.since(sheet_calls_start)}
+if PROFILE_LOG: append_log(PROFILE_LOG, run_profile, cache=dict(store.stats))
+
+if st.query_params.get("debug"):
+    with st.sidebar.expander("⏱️ Profile (this run)", expanded=True):
+        st.caption(f"🗄️ Shared Sheets cache: {store.stats['hits']} hits / {store.stats['misses']} misses / {store.stats['coalesced']} coalesced / {store.stats['queued']} queued writes")
+        st.dataframe(breakdown(run_profile), hide_index=True, use_container_width=True)
@@ -0,0 +1,182 @@
+"""Offline benchmarks for the tracker's hot paths.
+
+Runs app.py under Streamlit's AppTest against a LocalSheetsConnection with
+simulated per-call latency and synthetic history, and reports latency, Sheets
+calls and peak memory for each operation:
+
+    python bench.py --years 1 5 20 --latency 0.2 --json bench.json
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from local_store import LocalSheetsConnection, SyncWorker
+from partitions import LogPartitions
+from schema import HABIT_KEYS, LOG_COLUMNS, normalize_logs
+from scoring import StreakCache, build_rollup, history_log
+from sheets import SheetStore
+from snapshot import build_snapshot
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+TIMEOUT = 600
+
+
+# --- SYNTHETIC DATA ---
+def ist_today():
+    return (datetime.utcnow() + timedelta(hours=5, minutes=30)).date()
+
+def synthetic_sheets(years, today, seed=2026):
+    # `years` of daily Logs ending yesterday, a Schedule covering the same span
+    # plus a month ahead, and a small Checklist with every tag.
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(end=pd.Timestamp(today) - pd.Timedelta(days=1), periods=int(365 * years), freq="D")
+    logs = pd.DataFrame({"Date": days.strftime("%Y-%m-%d")})
+    for k in HABIT_KEYS:
+        done = rng.random(len(days)) < 0.6
+        logs[k] = done.astype(int)
+        logs[f"{k}_Detail"] = np.where(done, f"{k} notes", "")
+    logs["Next_Goal"] = "Ship it"
+    logs["Reflection"] = np.where(rng.random(len(days)) < 0.3, "Good day", "")
+    logs["Weekly_Retro"] = np.where(days.dayofweek == 6, "Win|Miss|Why|Fix|8", "")
+    logs = logs[LOG_COLUMNS]
+
+    plan = pd.date_range(start=days[0], end=pd.Timestamp(today) + pd.Timedelta(days=30), freq="D")
+    schedule = pd.DataFrame({"Date": plan.strftime("%Y-%m-%d"), "Task": [f"Study block {i}" for i in range(len(plan))]})
+
+    tags = ["Shopping", "Weekly", "Monthly", "One-off"]
+    checklist = pd.DataFrame({
+        "Task": [f"Task {i}" for i in range(24)],
+        "Tag": [tags[i % len(tags)] for i in range(24)],
+        "Status": [i % 2 for i in range(24)],
+        "Last_Completed": [str(today - timedelta(days=i)) for i in range(24)],
+    })
+    return {"Logs": logs, "Schedule": schedule, "Checklist": checklist}
+
+
+# --- MEASUREMENT ---
+def measure(conn, fn, repeat):
+    # Median wall time over `repeat` runs, Sheets calls per run, then one extra
+    # traced run for peak Python memory (tracing slows the timed runs otherwise).
+    times, calls = [], []
+    for _ in range(repeat):
+        before = dict(conn.calls)
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+        calls.append(sum(conn.calls[k] - before[k] for k in before))
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"ms": round(statistics.median(times) * 1000, 1), "sheet_calls": max(calls), "peak_mb": round(peak / 2**20, 2)}
+
+def wait_for_sync(timeout=30):
+    # Saves return before the outbox is pushed; count the background writes too.
+    workers = [t for t in threading.enumerate() if isinstance(t, SyncWorker)]
+    deadline = time.monotonic() + timeout
+    while any(w.mirror.pending() for w in workers) and time.monotonic() < deadline: time.sleep(0.01)
+
+def checked(at):
+    if at.exception: raise RuntimeError(at.exception[0].value)
+    return at
+
+
+# --- OPERATIONS ---
+def bench_app(conn, repeat):
+    # A new session on a cold process reads every sheet; later sessions share the cache.
+    def cold_load():
+        st.cache_resource.clear()
+        checked(AppTest.from_file(APP, default_timeout=TIMEOUT).run())
+    results = {"cold_load": measure(conn, cold_load, repeat)}
+    at = checked(AppTest.from_file(APP, default_timeout=TIMEOUT).run())
+    results["full_rerun"] = measure(conn, lambda: checked(at.run()), repeat)
+
+    def save_log():
+        done = next(c for c in at.checkbox if c.label == "Done?")
+        done.set_value(not done.value)
+        next(t for t in at.text_input if t.label == "What exercise?").set_value("Bench press")
+        at.button(key="FormSubmitter:f_Workout-Save").click()
+        checked(at.run())
+        wait_for_sync()
+    results["save_partial_log"] = measure(conn, save_log, repeat)
+
+    def toggle_checklist():
+        box = next(c for c in at.checkbox if (c.key or "").startswith("shop_"))
+        box.set_value(not box.value)
+        checked(at.run())
+        at.button(key="flush_checklist").click()
+        checked(at.run())
+        wait_for_sync()
+    results["checklist_toggle"] = measure(conn, toggle_checklist, repeat)
+    return results
+
+def bench_store(conn, repeat):
+    # An expired Logs cache is refreshed by date range, not re-read whole.
+    store = SheetStore(conn)
+    store.read("Logs")
+    def refresh():
+        store.invalidate("Logs")
+        store.read("Logs")
+    return {"logs_refresh": measure(conn, refresh, repeat)}
+
+def bench_scoring(conn, logs, today, repeat):
+    df = normalize_logs(logs.copy())
+    return {
+        "streaks_cold": measure(conn, lambda: StreakCache().get(df, today, HABIT_KEYS), repeat),
+        "weekly_history": measure(conn, lambda: history_log(build_rollup(df)), repeat),
+        "snapshot": measure(conn, lambda: build_snapshot(_partitions(logs), today), repeat),
+    }
+
+def _partitions(logs):
+    partitions = LogPartitions()
+    partitions.load(logs)
+    return partitions
+
+def run(years, latency, repeat):
+    today = ist_today()
+    sheets = synthetic_sheets(years, today)
+    conn = LocalSheetsConnection(sheets, latency=latency)
+    # Fresh process-wide caches (sync worker, profiler) for each dataset.
+    st.cache_resource.clear()
+    st.connection = lambda *args, **kwargs: conn
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["TRACKER_RESET_MARKER"] = os.path.join(tmp, ".last_reset")
+        results = bench_app(conn, repeat)
+    results.update(bench_store(conn, repeat))
+    results.update(bench_scoring(conn, sheets["Logs"], today, repeat))
+    return results
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=float, nargs="+", default=[1, 5, 20], help="history sizes to generate")
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per Sheets call")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per operation (median reported)")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for years in args.years:
+        for op, stats in run(years, args.latency, args.repeat).items():
+            rows.append({"years": years, "op": op, **stats})
+    table = pd.DataFrame(rows)
+    print(f"latency={args.latency}s/call repeat={args.repeat} ({date.today()})")
+    print(table.to_string(index=False))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"latency": args.latency, "repeat": args.repeat, "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import threading
+
+import pandas as pd
+
+from scoring import DAILY_HABITS, WEEKLY_HABIT
+
+TREND_VIEWS = ["Daily Trend", "Weekly Progress", "Monthly Summary"]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+# --- AGGREGATION ---
+# Each view gets only the rows it plots, grouped with the year in the key so
+# weeks and months from different years never merge.
+def daily_scores(frame):
+    return pd.DataFrame({
+        "Date": pd.to_datetime(frame["Date"]).values,
+        "Total_Score": frame[DAILY_HABITS + [WEEKLY_HABIT]].sum(axis=1).astype(int).values,
+    })
+
+def weekly_scores(daily):
+    iso = daily["Date"].dt.isocalendar()
+    weekly = daily.groupby([iso["year"], iso["week"]])["Total_Score"].sum().reset_index()
+    weekly["Week"] = [f"{y}-W{w:02d}" for y, w in zip(weekly["year"], weekly["week"])]
+    return weekly[["Week", "Total_Score"]]
+
+def monthly_scores(daily):
+    monthly = daily.groupby(daily["Date"].dt.to_period("M"))["Total_Score"].sum().reset_index()
+    monthly["Month"] = monthly["Date"].dt.strftime("%b %Y")
+    return monthly[["Month", "Total_Score"]]
+
+def heatmap_grid(daily):
+    # Weekday x ISO week grid of daily totals.
+    iso = daily["Date"].dt.isocalendar()
+    grid = pd.DataFrame({"Day": daily["Date"].dt.day_name().values, "Week": [f"{y}-W{w:02d}" for y, w in zip(iso["year"], iso["week"])], "Total_Score": daily["Total_Score"].values})
+    return grid.pivot_table(index="Day", columns="Week", values="Total_Score", aggfunc="sum").reindex(WEEKDAYS)
+
+
+# --- FIGURES ---
+# plotly is imported on the first figure built, not at app start.
+def trend_figure(view, frame):
+    import plotly.express as px
+    daily = daily_scores(frame)
+    if view == "Daily Trend":
+        return px.bar(daily, x="Date", y="Total_Score", color="Total_Score", color_continuous_scale="Blues")
+    if view == "Weekly Progress":
+        return px.bar(weekly_scores(daily), x="Week", y="Total_Score", color="Total_Score", color_continuous_scale="Greens", text="Total_Score")
+    return px.bar(monthly_scores(daily), x="Month", y="Total_Score", color="Total_Score", color_continuous_scale="Reds", text="Total_Score")
+
+def heatmap_figure(frame):
+    import plotly.express as px
+    return px.imshow(heatmap_grid(daily_scores(frame)), color_continuous_scale="Greens", aspect="auto", labels={"x": "Week", "y": "Day", "color": "Total_Score"})
+
+
+class FigureCache:
+    # One finished figure per (view, year), kept while that year's data key is unchanged.
+    def __init__(self):
+        self._figures = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, data_key, build):
+        with self._lock:
+            cached = self._figures.get(name)
+        if cached is not None and cached[0] == data_key: return cached[1]
+        fig = build()
+        with self._lock:
+            self._figures[name] = (data_key, fig)
+        return fig
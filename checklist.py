@@ -0,0 +1,67 @@
+from datetime import date
+
+import pandas as pd
+
+
+# --- PENDING CHANGES ---
+# Checklist edits are buffered as small ops keyed on Task and replayed onto the
+# sheet frame, both to render the optimistic view and to build the one batched
+# write that flushes them. The same ops are queued for the sheet and replayed on
+# a fresh read there, so rows changed by other sessions meanwhile are kept.
+def apply_ops(df, ops, today):
+    if not ops: return df
+    df = df.copy()
+    df["Tag"] = df["Tag"].astype(object)
+    for op in ops:
+        if op["op"] == "add":
+            idx = df.index.max() + 1 if len(df) else 0
+            df.loc[idx] = {"Task": op["task"], "Tag": op["tag"], "Status": 0, "Last_Completed": ""}
+            continue
+        # The nth row with this Task text, so same-named tasks stay distinct.
+        hits = df.index[df["Task"] == op["task"]]
+        nth = op.get("nth", 0)
+        if nth >= len(hits): continue
+        hit = hits[nth]
+        if op["op"] == "delete":
+            df = df.drop(hit)
+        elif op["op"] == "toggle":
+            df.at[hit, "Status"] = 1 if op["status"] else 0
+            if op["status"]: df.at[hit, "Last_Completed"] = str(today)
+        elif op["op"] == "reset" and df.at[hit, "Last_Completed"] == op["completed"]:
+            # Skipped if the task was ticked again since the reset was decided.
+            df.at[hit, "Status"] = 0
+    return df
+
+def occurrences(df):
+    # Which same-named row each row is (0 for the first): an op's row identity with its Task.
+    return df.groupby("Task", sort=False).cumcount()
+
+def pending_summary(ops):
+    counts = pd.Series([op["op"] for op in ops], dtype=object).value_counts()
+    return ", ".join(f"{n} {name}" for name, n in counts.items())
+
+
+# --- RECURRING RESETS ---
+def due_resets(df, today):
+    # Done Weekly tasks last completed in an earlier ISO week, and done Monthly
+    # tasks from an earlier calendar month (year-aware for both).
+    last = pd.to_datetime(df["Last_Completed"], format="%Y-%m-%d", errors="coerce")
+    iso = last.dt.isocalendar()
+    year, week = today.isocalendar()[:2]
+    stale_week = (iso["year"] != year) | (iso["week"] != week)
+    stale_month = (last.dt.year != today.year) | (last.dt.month != today.month)
+    due = ((df["Tag"] == "Weekly") & stale_week) | ((df["Tag"] == "Monthly") & stale_month)
+    return (df["Status"] == 1) & last.notna() & due.fillna(False).astype(bool)
+
+def reset_ops(df, mask):
+    rows = df.assign(nth=occurrences(df))[mask]
+    return [{"op": "reset", "task": task, "nth": int(nth), "completed": done} for task, nth, done in zip(rows["Task"], rows["nth"], rows["Last_Completed"])]
+
+def last_reset_day(path):
+    try:
+        with open(path) as f: return date.fromisoformat(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+def mark_reset(path, day):
+    with open(path, "w") as f: f.write(str(day))
@@ -0,0 +1,349 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+import pandas as pd
+from gspread.utils import a1_to_rowcol
+
+from sheets import WORKSHEETS, SheetStore, cell_value
+
+# Seconds between background flushes of the outbox / refreshes of the mirror.
+SYNC_INTERVAL = float(os.environ.get("TRACKER_SYNC_INTERVAL", 60))
+# Failed flushes (rate limits, outages) back off exponentially up to RETRY_MAX.
+RETRY_BASE = 1.0
+RETRY_MAX = 300.0
+# An op rejected this many times for a non-transient reason is set aside as
+# failed instead of blocking the rest of the queue.
+MAX_ATTEMPTS = 5
+
+
+# --- LOCAL MIRROR ---
+# Worksheet snapshots and a durable outbox of pending writes in one SQLite file.
+# Reads are served from the snapshots; SyncWorker pushes the outbox to Sheets.
+class LocalMirror:
+    keeps_snapshots = True
+
+    def __init__(self, path):
+        self.path = path
+        self.on_commit = None
+        self._lock = threading.Lock()
+        with self._lock, closing(sqlite3.connect(self.path)) as db, db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, worksheet TEXT, op TEXT, payload TEXT, created REAL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS failed ("
+                "id INTEGER PRIMARY KEY, worksheet TEXT, op TEXT, payload TEXT, created REAL, error TEXT)"
+            )
+
+    def load(self, worksheet):
+        with self._lock, closing(sqlite3.connect(self.path)) as db:
+            if not _has_table(db, _table(worksheet)): return None
+            return pd.read_sql(f'SELECT * FROM "{_table(worksheet)}"', db)
+
+    def snapshot(self, worksheet):
+        return self.load(worksheet)
+
+    def refresh(self, worksheet, df):
+        # Pull-side update; skipped while local writes to the sheet are unsent.
+        with self._lock, closing(sqlite3.connect(self.path)) as db:
+            if db.execute("SELECT 1 FROM outbox WHERE worksheet = ? LIMIT 1", (worksheet,)).fetchone():
+                return False
+            _save(db, worksheet, df)
+            return True
+
+    def commit(self, worksheet, df, op, payload=None):
+        with self._lock, closing(sqlite3.connect(self.path)) as db:
+            with db:
+                db.execute(
+                    "INSERT INTO outbox (worksheet, op, payload, created) VALUES (?, ?, ?, ?)",
+                    (worksheet, op, json.dumps(_encode(payload)), time.time()),
+                )
+            _save(db, worksheet, df)
+        if self.on_commit: self.on_commit()
+
+    def pending(self):
+        with self._lock, closing(sqlite3.connect(self.path)) as db:
+            rows = db.execute("SELECT id, worksheet, op, payload FROM outbox ORDER BY id").fetchall()
+        return [{"id": r[0], "worksheet": r[1], "op": r[2], "payload": _decode(json.loads(r[3]))} for r in rows]
+
+    def ack(self, op_id):
+        with self._lock, closing(sqlite3.connect(self.path)) as db, db:
+            db.execute("DELETE FROM outbox WHERE id = ?", (op_id,))
+
+    def fail(self, op_id, error):
+        # Moves the op out of the outbox; it stays listed until dismissed.
+        with self._lock, closing(sqlite3.connect(self.path)) as db, db:
+            db.execute("INSERT INTO failed SELECT id, worksheet, op, payload, created, ? FROM outbox WHERE id = ?", (error, op_id))
+            db.execute("DELETE FROM outbox WHERE id = ?", (op_id,))
+
+    def failed(self):
+        with self._lock, closing(sqlite3.connect(self.path)) as db:
+            rows = db.execute("SELECT id, worksheet, op, error FROM failed ORDER BY id").fetchall()
+        return [{"id": r[0], "worksheet": r[1], "op": r[2], "error": r[3]} for r in rows]
+
+    def dismiss(self):
+        with self._lock, closing(sqlite3.connect(self.path)) as db, db:
+            db.execute("DELETE FROM failed")
+
+
+# --- IN-MEMORY OUTBOX ---
+# Default write queue when no local mirror is configured: saves return at once
+# and SyncWorker pushes them, but nothing survives a process restart.
+class MemoryOutbox:
+    keeps_snapshots = False
+
+    def __init__(self):
+        self.on_commit = None
+        self._lock = threading.Lock()
+        self._ops = []
+        self._failed = []
+        self._frames = {}
+        self._next_id = 1
+
+    def load(self, worksheet):
+        return None
+
+    def snapshot(self, worksheet):
+        with self._lock:
+            df = self._frames.get(worksheet)
+            return df.copy() if df is not None else None
+
+    def refresh(self, worksheet, df):
+        return False
+
+    def commit(self, worksheet, df, op, payload=None):
+        with self._lock:
+            self._ops.append({"id": self._next_id, "worksheet": worksheet, "op": op, "payload": payload})
+            self._frames[worksheet] = df.copy()
+            self._next_id += 1
+        if self.on_commit: self.on_commit()
+
+    def pending(self):
+        with self._lock:
+            return list(self._ops)
+
+    def ack(self, op_id):
+        with self._lock:
+            self._ops = [op for op in self._ops if op["id"] != op_id]
+
+    def fail(self, op_id, error):
+        with self._lock:
+            self._failed += [{"id": op["id"], "worksheet": op["worksheet"], "op": op["op"], "error": error} for op in self._ops if op["id"] == op_id]
+            self._ops = [op for op in self._ops if op["id"] != op_id]
+
+    def failed(self):
+        with self._lock:
+            return list(self._failed)
+
+    def dismiss(self):
+        with self._lock:
+            self._failed = []
+
+
+# --- BACKGROUND SYNC ---
+class SyncWorker(threading.Thread):
+    def __init__(self, mirror, conn, interval=SYNC_INTERVAL):
+        super().__init__(name="sheets-sync", daemon=True)
+        self.mirror = mirror
+        # Invalidated at the start of every flush: each worksheet is read once
+        # per batch and later ops in the batch patch that frame.
+        self.remote = SheetStore(conn, max_age=float("inf"))
+        self.interval = interval
+        self.last_sync = None
+        self.last_error = None
+        self.failures = 0
+        self._attempts = {}
+        self._wake = threading.Event()
+        mirror.on_commit = self.poke
+
+    def run(self):
+        while True:
+            if self.flush():
+                self._wake.wait(self.interval)
+                self._wake.clear()
+            else:
+                time.sleep(self.backoff())
+
+    def backoff(self):
+        return min(RETRY_BASE * 2 ** (self.failures - 1), RETRY_MAX)
+
+    def poke(self):
+        self._wake.set()
+
+    def flush(self):
+        self.remote.invalidate()
+        try:
+            for op in self.mirror.pending():
+                try:
+                    self._apply(op)
+                except Exception as e:
+                    if not self._give_up(op, e): raise
+                    self.mirror.fail(op["id"], str(e))
+                    self.remote.invalidate(op["worksheet"])
+                    continue
+                self._attempts.pop(op["id"], None)
+                self.mirror.ack(op["id"])
+            if self.mirror.keeps_snapshots:
+                for worksheet in WORKSHEETS:
+                    self.mirror.refresh(worksheet, self.remote.read(worksheet))
+        except Exception as e:
+            # Offline or rate-limited: the op stays queued and is retried after backoff().
+            self.last_error = e
+            self.failures += 1
+            return False
+        self.last_error = None
+        self.failures = 0
+        self.last_sync = time.time()
+        return True
+
+    def _give_up(self, op, error):
+        # Outages and rate limits are retried for as long as they last; any
+        # other error counts towards MAX_ATTEMPTS for this op.
+        if _transient(error): return False
+        self._attempts[op["id"]] = self._attempts.get(op["id"], 0) + 1
+        return self._attempts[op["id"]] >= MAX_ATTEMPTS
+
+    def _apply(self, op):
+        # Upserts and Checklist ops re-read the sheet first and change only the
+        # row matching their Date/Task, so edits made elsewhere to other rows
+        # survive. Full replacements (imports) push the local snapshot as-is.
+        p = op["payload"]
+        if op["op"] == "upsert":
+            self.remote.upsert(op["worksheet"], p["key_col"], p["key"], p["values"], p["defaults"])
+        elif op["op"] == "ops":
+            self.remote.patch(op["worksheet"], p["ops"], p["today"])
+        elif op["op"] == "replace":
+            df = self.mirror.snapshot(op["worksheet"])
+            if df is not None: self.remote.write(op["worksheet"], df)
+
+
+# --- OFFLINE STAND-IN ---
+# Same read/update surface as GSheetsConnection, backed by in-memory frames and
+# optionally a folder of <Worksheet>.csv files. Set `offline` to simulate an outage
+# and `latency` (seconds per call) to simulate the Sheets API round trip. `client`
+# hands out worksheets with the cell-level calls SheetStore uses for single-row
+# saves, so those are exercised (and counted in `calls`) as against a real sheet.
+class LocalSheetsConnection:
+    def __init__(self, sheets=None, folder=None, latency=0.0):
+        self.folder = folder
+        self.sheets = {name: df.copy() for name, df in (sheets or {}).items()}
+        if folder:
+            for name in WORKSHEETS:
+                path = os.path.join(folder, f"{name}.csv")
+                if os.path.exists(path): self.sheets[name] = pd.read_csv(path)
+        self.offline = False
+        self.latency = latency
+        self.calls = {"read": 0, "update": 0, "row_values": 0, "col_values": 0, "get_values": 0, "batch_update": 0, "append_row": 0}
+        self.client = _LocalClient(self)
+
+    def read(self, worksheet=None, usecols=None, ttl=None, **options):
+        self._call("read")
+        df = self.sheets.get(worksheet, pd.DataFrame()).copy()
+        if usecols is not None: df = df.iloc[:, [c for c in usecols if c < df.shape[1]]]
+        return df
+
+    def update(self, worksheet=None, data=None, **options):
+        self._call("update")
+        self._store(worksheet, data)
+        return data
+
+    def reset(self):
+        pass
+
+    def _call(self, name):
+        if self.offline: raise ConnectionError("Sheets unavailable (offline)")
+        if self.latency: time.sleep(self.latency)
+        self.calls[name] += 1
+
+    def _store(self, worksheet, df):
+        self.sheets[worksheet] = df.copy()
+        if self.folder: df.to_csv(os.path.join(self.folder, f"{worksheet}.csv"), index=False)
+
+class _LocalClient:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def _select_worksheet(self, worksheet=None):
+        if worksheet not in self.conn.sheets: raise KeyError(f"No worksheet named {worksheet!r}")
+        return _LocalWorksheet(self.conn, worksheet)
+
+class _LocalWorksheet:
+    # Rows and columns are 1-based with the header in row 1, as in gspread.
+    def __init__(self, conn, name):
+        self.conn = conn
+        self.name = name
+
+    def row_values(self, row, **options):
+        self.conn._call("row_values")
+        df = self.conn.sheets[self.name]
+        if row == 1: return [str(c) for c in df.columns]
+        return ["" if pd.isna(v) else str(v) for v in df.iloc[row - 2]]
+
+    def col_values(self, col, **options):
+        self.conn._call("col_values")
+        df = self.conn.sheets[self.name]
+        return [str(df.columns[col - 1])] + ["" if pd.isna(v) else str(v) for v in df.iloc[:, col - 1]]
+
+    def get_values(self, range_name, **options):
+        # Only the "A<row>:<col>" ranges of SheetStore's tail reads.
+        self.conn._call("get_values")
+        start, end = range_name.split(":")
+        row, _ = a1_to_rowcol(start)
+        _, col = a1_to_rowcol(f"{end}1")
+        df = self.conn.sheets[self.name].iloc[row - 2:, :col]
+        return [["" if pd.isna(v) else cell_value(v) for v in r] for r in df.itertuples(index=False)]
+
+    def batch_update(self, data, **options):
+        self.conn._call("batch_update")
+        df = self.conn.sheets[self.name].copy()
+        for cell in data:
+            row, col = a1_to_rowcol(cell["range"])
+            name = df.columns[col - 1]
+            df[name] = df[name].astype(object)
+            df.iat[row - 2, col - 1] = cell["values"][0][0]
+        self.conn._store(self.name, df)
+
+    def append_row(self, values, **options):
+        self.conn._call("append_row")
+        df = self.conn.sheets[self.name]
+        self.conn._store(self.name, pd.concat([df, pd.DataFrame([values], columns=df.columns[:len(values)])], ignore_index=True))
+
+
+# --- HELPERS ---
+def _transient(error):
+    # Network errors and HTTP 429/5xx responses (gspread's APIError carries the response).
+    if isinstance(error, OSError): return True
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+def _table(worksheet):
+    return f"sheet_{worksheet}"
+
+def _has_table(db, name):
+    return db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is not None
+
+def _save(db, worksheet, df):
+    if df.columns.empty: return
+    out = df.copy()
+    for col in out.columns:
+        if out[col].dtype == object: out[col] = out[col].map(lambda v: str(v) if isinstance(v, (date, datetime)) else v)
+    out.to_sql(_table(worksheet), db, if_exists="replace", index=False)
+
+def _encode(payload):
+    if payload is None or "key" not in payload: return payload
+    out = dict(payload)
+    out["date_key"] = isinstance(payload["key"], date)
+    out["key"] = cell_value(payload["key"])
+    out["values"] = {k: cell_value(v) for k, v in payload["values"].items()}
+    out["defaults"] = {k: cell_value(v) for k, v in (payload.get("defaults") or {}).items()}
+    return out
+
+def _decode(payload):
+    if payload and payload.pop("date_key", False): payload["key"] = date.fromisoformat(payload["key"])
+    return payload
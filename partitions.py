@@ -0,0 +1,126 @@
+import threading
+from datetime import timedelta
+
+import pandas as pd
+
+from schema import LOG_COLUMNS, normalize_logs
+from scoring import WeeklyRollup, build_rollup
+from sheets import row_hashes
+
+# Days before today kept from the previous ISO year in the default window, so
+# yesterday's goal and the first days of a new year still resolve.
+PREVIOUS_TAIL_DAYS = 7
+
+
+# --- YEAR PARTITIONS ---
+# Logs split by ISO year (so no week straddles two partitions). A partition is
+# normalized and rolled up on first use and kept until its own rows change: a
+# save re-parses only the current year, and older years are only touched when
+# they are browsed or their totals are first needed.
+class LogPartitions:
+    def __init__(self):
+        self.version = None
+        self._raw = {}
+        self._frames = {}
+        self._rollups = {}
+        self._current = WeeklyRollup()
+        self._lock = threading.RLock()
+
+    def refresh(self, store):
+        # Re-splits only when the store has a new version of the Logs sheet,
+        # and after plain saves only the years of the dates they touched. Once
+        # cached, the store refreshes Logs by date range (see sheets.TAIL_READS).
+        if store.version("Logs") == self.version: return
+        with self._lock:
+            if store.version("Logs") == self.version: return
+            raw = store.read("Logs")
+            self.load(raw, store.version("Logs"), _iso_years(store.changed_keys("Logs", self.version)))
+
+    def load(self, raw, version=None, years=None):
+        # Splits a raw Logs frame (as read from the sheet or an export). With
+        # `years`, the other years are known unchanged and keep their rows.
+        with self._lock:
+            self._raw = _split(raw, years=years, previous=self._raw)
+            self.version = version
+
+    def years(self):
+        return sorted(self._raw)
+
+    def fingerprint(self):
+        # Identifies the whole Logs content across processes (e.g. for snapshots).
+        return ",".join(f"{year}:{self._raw[year][0]}" for year in self.years())
+
+    def key(self, year):
+        # Fingerprint of one year's rows; changes only when that year does.
+        entry = self._raw.get(year)
+        return entry[0] if entry is not None else None
+
+    def frame(self, year):
+        # One ISO year, normalized; empty if nothing was logged that year.
+        with self._lock:
+            if year not in self._raw: return pd.DataFrame(columns=LOG_COLUMNS)
+            key, rows = self._raw[year]
+            cached = self._frames.get(year)
+            if cached is None or cached[0] != key:
+                cached = (key, normalize_logs(rows.copy()))
+                self._frames[year] = cached
+            return cached[1]
+
+    def window(self, today):
+        # Default view: the current ISO year plus the last few days of the previous one.
+        year = today.isocalendar()[0]
+        previous = self.frame(year - 1)
+        tail = previous[previous["Date"] >= pd.Timestamp(today - timedelta(days=PREVIOUS_TAIL_DAYS))]
+        return _concat([tail, self.frame(year)])
+
+    def history(self, years=None):
+        # Lazily loads and concatenates the given years (all of them by default).
+        return _concat([self.frame(y) for y in (self.years() if years is None else years)])
+
+    def rollup(self, today):
+        # Weekly table across every year: past years are rolled up once per
+        # change, the current year through WeeklyRollup's current-week splice.
+        current = today.isocalendar()[0]
+        tables = []
+        with self._lock:
+            for year in self.years():
+                key = self._raw[year][0]
+                if year == current:
+                    tables.append(self._current.get(self.frame(year), today, key))
+                    continue
+                cached = self._rollups.get(year)
+                if cached is None or cached[0] != key:
+                    cached = (key, build_rollup(self.frame(year)))
+                    self._rollups[year] = cached
+                tables.append(cached[1])
+        if not tables: return build_rollup(self.frame(current))
+        return pd.concat(tables).sort_index()
+
+
+# --- HELPERS ---
+def _split(raw, years=None, previous=None):
+    # {iso_year: (fingerprint, raw rows)}; rows without a valid date are dropped.
+    # Only `years` are regrouped and rehashed when given; the rest come from `previous`.
+    if raw.empty or "Date" not in raw.columns: return {}
+    dates = pd.to_datetime(raw["Date"], errors="coerce")
+    raw, dates = raw[dates.notna()], dates[dates.notna()]
+    iso_years = dates.dt.isocalendar()["year"].values
+    if years is None:
+        keys = row_hashes(raw).groupby(iso_years).sum()
+        return {int(year): (int(keys[year]), rows) for year, rows in raw.groupby(iso_years, sort=True)}
+    out = {year: entry for year, entry in previous.items() if year not in years}
+    for year in years:
+        rows = raw[iso_years == year]
+        if len(rows): out[year] = (int(row_hashes(rows).sum()), rows)
+    return dict(sorted(out.items()))
+
+def _iso_years(keys):
+    # ISO years of upserted Date keys; None (re-split everything) if any is not a date.
+    if keys is None: return None
+    try: return {pd.Timestamp(k).isocalendar()[0] for k in keys}
+    except (TypeError, ValueError): return None
+
+def _concat(frames):
+    frames = [f for f in frames if not f.empty]
+    if not frames: return pd.DataFrame(columns=LOG_COLUMNS)
+    return pd.concat(frames) if len(frames) > 1 else frames[0]
@@ -0,0 +1,122 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Append one JSON line per full rerun to this file when set.
+PROFILE_LOG = os.environ.get("TRACKER_PROFILE_LOG")
+
+
+# --- TIMERS & COUNTERS ---
+class Profiler:
+    def __init__(self):
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        with self._lock:
+            entry = self.stats.setdefault(name, {"calls": 0, "ms": 0.0})
+            entry["calls"] += 1
+            entry["ms"] += seconds * 1000
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {k: dict(v) for k, v in self.stats.items()}
+
+    def since(self, snapshot):
+        out = {}
+        for name, entry in self.snapshot().items():
+            before = snapshot.get(name, {"calls": 0, "ms": 0.0})
+            if entry["calls"] > before["calls"]:
+                out[name] = {"calls": entry["calls"] - before["calls"], "ms": entry["ms"] - before["ms"]}
+        return out
+
+def breakdown(stats):
+    df = pd.DataFrame([{"Phase": k, "Calls": v["calls"], "ms": round(v["ms"], 1)} for k, v in stats.items()])
+    return df.sort_values("ms", ascending=False, ignore_index=True) if not df.empty else df
+
+def append_log(path, stats, **meta):
+    record = {"ts": time.time(), **meta, "phases": {k: {"calls": v["calls"], "ms": round(v["ms"], 2)} for k, v in stats.items()}}
+    with open(path, "a") as f: f.write(json.dumps(record) + "\n")
+
+
+# --- SHEETS CALL WRAPPER ---
+# Times every read/update against the wrapped connection, and the row-level
+# calls on worksheets reached through `client` (see sheets._worksheet_handle).
+# Calls made by the background sync thread are labelled separately from those
+# on a rerun's path.
+class InstrumentedConnection:
+    def __init__(self, conn, profiler):
+        self._conn = conn
+        self.profiler = profiler
+
+    def read(self, worksheet=None, **options):
+        with self.profiler.phase(self._label("read", worksheet)):
+            return self._conn.read(worksheet=worksheet, **options)
+
+    def update(self, worksheet=None, **options):
+        with self.profiler.phase(self._label("update", worksheet)):
+            return self._conn.update(worksheet=worksheet, **options)
+
+    @property
+    def client(self):
+        client = getattr(self._conn, "client", None)
+        return _InstrumentedClient(client, self) if client is not None else None
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def _label(self, op, worksheet):
+        prefix = "sync." if threading.current_thread().name == "sheets-sync" else ""
+        return f"{prefix}sheets.{op}[{worksheet}]"
+
+class _InstrumentedClient:
+    def __init__(self, client, conn):
+        self._client = client
+        self._conn = conn
+
+    def _select_worksheet(self, worksheet=None, **options):
+        return _InstrumentedWorksheet(self._client._select_worksheet(worksheet=worksheet, **options), worksheet, self._conn)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+class _InstrumentedWorksheet:
+    def __init__(self, ws, name, conn):
+        self._ws = ws
+        self._name = name
+        self._conn = conn
+
+    def row_values(self, row, **options):
+        with self._conn.profiler.phase(self._conn._label("row_values", self._name)):
+            return self._ws.row_values(row, **options)
+
+    def col_values(self, col, **options):
+        with self._conn.profiler.phase(self._conn._label("col_values", self._name)):
+            return self._ws.col_values(col, **options)
+
+    def get_values(self, range_name, **options):
+        with self._conn.profiler.phase(self._conn._label("get_values", self._name)):
+            return self._ws.get_values(range_name, **options)
+
+    def batch_update(self, data, **options):
+        with self._conn.profiler.phase(self._conn._label("batch_update", self._name)):
+            return self._ws.batch_update(data, **options)
+
+    def append_row(self, values, **options):
+        with self._conn.profiler.phase(self._conn._label("append_row", self._name)):
+            return self._ws.append_row(values, **options)
+
+    def __getattr__(self, name):
+        return getattr(self._ws, name)
@@ -0,0 +1,44 @@
+import threading
+from datetime import timedelta
+
+import pandas as pd
+
+
+# --- SCHEDULE INDEX ---
+# Tasks keyed by calendar date, rebuilt only when the store holds a new version
+# of the Schedule sheet. Lookups take the day explicitly, so a new IST day needs
+# no rebuild and any day or range is a dict lookup per date.
+class ScheduleIndex:
+    def __init__(self):
+        self.version = None
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, store):
+        if store.version("Schedule") == self.version: return
+        with self._lock:
+            if store.version("Schedule") == self.version: return
+            raw = store.read("Schedule")
+            self._tasks = _index(raw)
+            self.version = store.version("Schedule")
+
+    def on(self, day):
+        return self._tasks.get(day, ())
+
+    def upcoming(self, start, days=7):
+        # [(date, tasks)] for the days from `start` that have something planned.
+        span = (start + timedelta(days=i) for i in range(days))
+        return [(d, self._tasks[d]) for d in span if d in self._tasks]
+
+
+def _index(raw):
+    # First column is the date, second the task; unparseable dates are skipped
+    # and several tasks on one day keep their sheet order.
+    if raw.shape[1] < 2 or raw.empty: return {}
+    dates = pd.to_datetime(raw.iloc[:, 0], errors="coerce")
+    tasks = raw.iloc[:, 1].where(raw.iloc[:, 1].notna(), "").astype(str)
+    keep = dates.notna()
+    out = {}
+    for day, task in zip(dates[keep].dt.date, tasks[keep]):
+        out.setdefault(day, []).append(task)
+    return {day: tuple(ts) for day, ts in out.items()}
@@ -0,0 +1,50 @@
+import pandas as pd
+
+# --- LOGS SCHEMA ---
+QUESTIONS = [
+    {"key": "Workout", "icon": "💪", "color": "red", "q": "Did you WORKOUT today?", "ask_detail": "What exercise?"},
+    {"key": "Code", "icon": "💻", "color": "blue", "q": "Did you CODE/AI today?", "ask_detail": "Topic studied?"},
+    {"key": "Read", "icon": "📚", "color": "orange", "q": "Did you READ 10 mins?", "ask_detail": "Book/Page?"},
+    {"key": "NoJunk", "icon": "🥦", "color": "green", "q": "Did you eat CLEAN?", "ask_detail": "What meal?"},
+    {"key": "Connect", "icon": "🤝", "color": "pink", "q": "Did you CONNECT?", "ask_detail": "Who?"},
+    {"key": "SideHustle", "icon": "🎥", "color": "violet", "q": "SIDE HUSTLE work?", "ask_detail": "Progress?"}
+]
+
+HABIT_KEYS = [q["key"] for q in QUESTIONS]
+TEXT_COLUMNS = [f"{k}_Detail" for k in HABIT_KEYS] + ["Next_Goal", "Reflection", "Weekly_Retro"]
+LOG_COLUMNS = ["Date"] + [c for k in HABIT_KEYS for c in (k, f"{k}_Detail")] + ["Next_Goal", "Reflection", "Weekly_Retro"]
+CHECKLIST_COLUMNS = ["Task", "Tag", "Status", "Last_Completed"]
+TAGS = ["Shopping", "Weekly", "Monthly", "One-off"]
+TRUTHY = ["TRUE", "T", "YES", "ON"]
+
+
+# --- NORMALIZATION ---
+def to_flag(col):
+    # Vectorised clean_bool: numbers count when > 0, text when it reads as true.
+    num = pd.to_numeric(col, errors="coerce")
+    return (num > 0) | (num.isna() & col.astype(str).str.upper().isin(TRUTHY))
+
+def _text(col):
+    return col.astype(object).where(col.notna(), "")
+
+def normalize_logs(df):
+    # Applied once per read: datetime64 Date (also the index, sorted), int8
+    # habit flags and "" for empty text cells. Rows without a valid date are dropped.
+    if df.empty or "Date" not in df.columns: return df
+    df["Date"] = pd.to_datetime(df["Date"], errors="coerce").dt.normalize()
+    df = df[df["Date"].notna()].sort_values("Date", kind="stable")
+    for k in HABIT_KEYS:
+        df[k] = to_flag(df[k]).astype("int8") if k in df.columns else pd.Series(0, index=df.index, dtype="int8")
+    for c in TEXT_COLUMNS:
+        df[c] = _text(df[c]) if c in df.columns else ""
+    df.index = pd.DatetimeIndex(df["Date"].values)
+    return df
+
+def normalize_checklist(df):
+    for c in CHECKLIST_COLUMNS:
+        if c not in df.columns: df[c] = ""
+    df["Task"] = _text(df["Task"]).astype(str)
+    df["Tag"] = pd.Categorical(_text(df["Tag"]), categories=sorted(set(TAGS) | set(_text(df["Tag"]))))
+    df["Status"] = to_flag(df["Status"]).astype("int8")
+    df["Last_Completed"] = _text(df["Last_Completed"]).astype(str)
+    return df
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+
+from schema import HABIT_KEYS, to_flag
+
+ONE_DAY = np.timedelta64(1, "D")
+
+
+# --- HABIT FLAGS ---
+# Frames from normalize_logs() already hold datetime64 dates and int8 flags;
+# only raw sheet columns are parsed here.
+def _log_dates(df):
+    col = df["Date"]
+    return col if pd.api.types.is_datetime64_any_dtype(col) else pd.to_datetime(col, errors="coerce")
+
+def habit_flags(df, keys):
+    out = pd.DataFrame(index=df.index)
+    for k in keys:
+        if k not in df.columns: out[k] = False
+        else: out[k] = df[k] > 0 if pd.api.types.is_integer_dtype(df[k]) else to_flag(df[k])
+    return out
+
+def daily_flags(df, keys):
+    # One row per logged day, sorted, with a bool per habit plus "Any".
+    flags = habit_flags(df, keys)
+    flags["Any"] = flags[keys].any(axis=1) if keys else False
+    flags.index = _log_dates(df).values.astype("datetime64[D]")
+    flags = flags[~pd.isna(flags.index)]
+    return flags.groupby(level=0).any().sort_index()
+
+
+# --- STREAKS ---
+def _runs(days, end):
+    # `days` is a sorted array of active datetime64[D] days. Returns the length
+    # of the run finishing exactly on `end` and the longest run up to `end`.
+    days = days[days <= end]
+    if len(days) == 0: return 0, 0
+    starts = np.r_[True, np.diff(days) != ONE_DAY]
+    lengths = np.bincount(np.cumsum(starts) - 1)
+    ending = int(lengths[-1]) if days[-1] == end else 0
+    return ending, int(lengths.max())
+
+def _combine(base, today_done):
+    # The current streak counts back from today when today is done, otherwise
+    # from yesterday, matching the header's original rule.
+    ending, longest = base
+    current = ending + 1 if today_done else ending
+    return {"current": current, "longest": max(longest, current)}
+
+class StreakCache:
+    # Streaks for days before today only change when that history changes, so
+    # they are kept per (today, history fingerprint) and a save that touches
+    # only today just re-applies today's flags.
+    def __init__(self):
+        self.version = None
+        self.result = None
+        self._base_key = None
+        self._base = None
+
+    def get(self, df, today, keys, version=None):
+        if version is not None and (version, today) == self.version: return self.result
+        flags = daily_flags(df, keys)
+        t = np.datetime64(today, "D")
+        history = flags[flags.index < t]
+        base_key = (today, int(pd.util.hash_pandas_object(history, index=True).sum()))
+        if base_key != self._base_key:
+            yesterday = t - ONE_DAY
+            self._base = {col: _runs(history.index.values[history[col].values], yesterday) for col in flags.columns}
+            self._base_key = base_key
+
+        done = flags.loc[t] if t in flags.index else pd.Series(False, index=flags.columns)
+        overall = _combine(self._base["Any"], bool(done["Any"]))
+        self.result = {
+            "current": overall["current"],
+            "longest": overall["longest"],
+            "habits": {k: _combine(self._base[k], bool(done[k])) for k in keys},
+        }
+        self.version = (version, today)
+        return self.result
+
+def compute_streaks(df, today, keys):
+    return StreakCache().get(df, today, keys)
+
+
+# --- WEEKLY ROLLUP ---
+WEEKLY_HABIT = "Connect"
+DAILY_HABITS = [k for k in HABIT_KEYS if k != WEEKLY_HABIT]
+WEEK_POSSIBLE = 31
+JACKPOT_MIN_PCT = 50
+POINTS_PER_PCT = 5
+XP_PER_TASK = 10
+
+def build_rollup(df):
+    # One row per ISO (Year, Week_Num): habit totals, the Connect flag,
+    # completion %, jackpot points and the latest non-empty retro.
+    dates = _log_dates(df)
+    keep = dates.notna()
+    df, dates = df[keep], dates[keep]
+    iso = dates.dt.isocalendar()
+    habits = pd.DataFrame({k: _numeric(df[k]) if k in df.columns else 0.0 for k in DAILY_HABITS + [WEEKLY_HABIT]}, index=df.index).fillna(0)
+    groups = habits.groupby([iso["year"].rename("Year"), iso["week"].rename("Week_Num")])
+
+    rollup = groups.sum()
+    rollup["Days"] = groups.size()
+    rollup["Daily"] = rollup[DAILY_HABITS].sum(axis=1)
+    rollup["Connect_Done"] = (rollup[WEEKLY_HABIT] >= 1).astype(int)
+    rollup["Total"] = rollup["Daily"] + rollup["Connect_Done"]
+    rollup["Pct"] = (rollup["Total"] / WEEK_POSSIBLE * 100).astype(int)
+    rollup["Points"] = rollup["Pct"].where(rollup["Pct"] > JACKPOT_MIN_PCT, 0) * POINTS_PER_PCT
+
+    retro = df["Weekly_Retro"] if "Weekly_Retro" in df.columns else pd.Series("", index=df.index)
+    has_retro = retro.notna() & (retro.astype(str).str.strip() != "")
+    latest = (
+        pd.DataFrame({"Date": dates, "Year": iso["year"], "Week_Num": iso["week"], "Retro": retro})[has_retro]
+        .sort_values("Date").groupby(["Year", "Week_Num"])["Retro"].last()
+    )
+    rollup["Retro"] = latest.reindex(rollup.index).fillna("").astype(str)
+    return rollup.sort_index()
+
+class WeeklyRollup:
+    # Past weeks only change when their rows change, so after a save in the
+    # current ISO week only that week is regrouped and spliced back in.
+    def __init__(self):
+        self.version = None
+        self.table = None
+        self._past_key = None
+
+    def get(self, df, today, version=None):
+        if version is not None and (version, today) == self.version: return self.table
+        week_start = pd.Timestamp(today) - pd.Timedelta(days=today.weekday())
+        dates = _log_dates(df)
+        # Rows dated after this week (e.g. imported) are keyed with the past,
+        # so only the current week itself is regrouped and spliced.
+        in_week = (dates >= week_start) & (dates < week_start + pd.Timedelta(days=7))
+        past, current = df[~in_week], df[in_week]
+        past_key = (week_start, int(pd.util.hash_pandas_object(past, index=False).sum()))
+        if self.table is None or past_key != self._past_key:
+            self.table = build_rollup(df)
+        else:
+            year, week = today.isocalendar()[:2]
+            fresh = build_rollup(current)
+            self.table = pd.concat([self.table.drop(index=[(year, week)], errors="ignore"), fresh]).sort_index()
+        self._past_key = past_key
+        self.version = (version, today)
+        return self.table
+
+def week_metrics(rollup, today):
+    year, week = today.isocalendar()[:2]
+    row = rollup.loc[(year, week)] if (year, week) in rollup.index else pd.Series(0, index=rollup.columns)
+    pct = int(row["Total"] / WEEK_POSSIBLE * 100)
+    slots = int(row["Days"]) * len(DAILY_HABITS)
+    return {
+        "year": year,
+        "week": week,
+        "daily": int(row["Daily"]),
+        "connect": int(row[WEEKLY_HABIT] >= 1),
+        "total": int(row["Total"]),
+        "pct": pct,
+        "reward": pct * POINTS_PER_PCT if pct > JACKPOT_MIN_PCT else 0,
+        "consistency": int(row["Daily"] / slots * 100) if slots else 0,
+        "missed": pd.to_numeric(row[DAILY_HABITS]).sort_values(kind="stable").head(2).index.tolist(),
+    }
+
+def lifetime_metrics(rollup):
+    jackpot = int(rollup["Points"].sum())
+    xp = int(rollup[DAILY_HABITS + [WEEKLY_HABIT]].sum().sum() * XP_PER_TASK)
+    return {"jackpot": jackpot, "xp": xp, "score": xp + jackpot}
+
+def _numeric(col):
+    return col if pd.api.types.is_numeric_dtype(col) else pd.to_numeric(col, errors="coerce")
+
+def history_log(rollup, start=0, stop=None):
+    # Newest week first; start/stop slice that order so a page builds only its rows.
+    rollup = rollup.iloc[::-1].iloc[start:stop]
+    log = pd.DataFrame({
+        "Week": [f"{y}-W{w}" for y, w in rollup.index],
+        "Tasks Done": rollup["Total"].astype(int).values,
+        "Completion": rollup["Pct"].astype(str).values + "%",
+        "Points": rollup["Points"].astype(int).values,
+        "Status": ["🏆 WON" if p > 0 else "❌ Missed" for p in rollup["Points"]],
+        "Retrospective": rollup["Retro"].values,
+    })
+    return log.to_dict("records")
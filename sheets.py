@@ -0,0 +1,362 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from numbers import Number
+
+import numpy as np
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+from pandas.io.parsers import TextParser
+
+from checklist import apply_ops
+from schema import normalize_checklist
+
+# --- WORKSHEET LAYOUT ---
+WORKSHEETS = {
+    "Logs": list(range(16)),
+    "Schedule": [0, 1],
+    "Checklist": [0, 1, 2, 3],
+}
+
+# Seconds a cached worksheet may be served before it is fetched again.
+CACHE_MAX_AGE = float(os.environ.get("TRACKER_CACHE_MAX_AGE", 300))
+# Versions per worksheet for which the upserted key is remembered (see changed_keys).
+CHANGE_LOG = 100
+
+# Worksheets refreshed by date range once cached: {worksheet: date column}.
+# A refresh re-reads only the rows dated within TAIL_DAYS and keeps the older
+# ones from the cached frame, until the last full read is HISTORY_MAX_AGE old.
+TAIL_READS = {"Logs": "Date"}
+TAIL_DAYS = 400
+HISTORY_MAX_AGE = float(os.environ.get("TRACKER_HISTORY_MAX_AGE", 6 * 3600))
+
+HASH_PRIME = np.uint64(1000003)
+BLANK_HASH = pd.util.hash_array(np.array([""], dtype=object))[0]
+
+
+# --- READ CACHE ---
+# Safe to share between sessions and threads: each worksheet has its own lock,
+# so concurrent misses on the same sheet wait for one fetch (single flight) and
+# a read-modify-write never interleaves with another session's.
+class SheetStore:
+    def __init__(self, conn, max_age=CACHE_MAX_AGE, mirror=None):
+        self.conn = conn
+        self.max_age = max_age
+        self.mirror = mirror
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "reads": 0, "tail_reads": 0, "local_reads": 0, "writes": 0, "queued": 0}
+        self._frames = {}
+        self._full_at = {}
+        self._versions = {}
+        self._digests = {}
+        self._changes = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def version(self, worksheet):
+        return self._versions.get(worksheet, 0)
+
+    def changed_keys(self, worksheet, since):
+        # Keys upserted after version `since`, or None when anything else
+        # changed the sheet since then (or it is older than CHANGE_LOG).
+        if since is not None and since >= self.version(worksheet): return set()
+        log = list(self._changes.get(worksheet, []))
+        newer = [key for v, key in log if since is not None and v > since]
+        if since is None or not log or log[0][0] > since + 1 or None in newer: return None
+        return set(newer)
+
+    def read(self, worksheet):
+        if self._fresh(worksheet):
+            self.stats["hits"] += 1
+            return self._frames[worksheet][0].copy()
+        return self._load(worksheet).copy()
+
+    def prefetch(self, worksheets=tuple(WORKSHEETS)):
+        # Fetches every stale worksheet in parallel so a cold load costs roughly
+        # the slowest single read; failures are left for read() to surface.
+        stale = [ws for ws in worksheets if not self._fresh(ws)]
+        if not stale: return
+        ctx = _script_ctx()
+        with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+            for ws in stale: pool.submit(self._load, ws, ctx)
+
+    def write(self, worksheet, df):
+        with self._lock(worksheet):
+            self._write(worksheet, df)
+
+    def upsert(self, worksheet, key_col, key, values, defaults=None):
+        with self._lock(worksheet):
+            return self._upsert(worksheet, key_col, key, values, defaults)
+
+    def patch(self, worksheet, ops, today):
+        # Task-keyed Checklist ops (see checklist.apply_ops), applied to the
+        # latest frame rather than written as a whole-sheet replacement.
+        with self._lock(worksheet):
+            return self._patch(worksheet, ops, today)
+
+    def invalidate(self, worksheet=None):
+        # Expires rather than drops, so the frame can still seed a tail read.
+        with self._guard:
+            for ws in list(self._frames) if worksheet is None else [worksheet]:
+                if ws in self._frames: self._frames[ws] = (self._frames[ws][0], float("-inf"))
+
+    def _lock(self, worksheet):
+        with self._guard:
+            return self._locks.setdefault(worksheet, threading.RLock())
+
+    def _load(self, worksheet, ctx=None):
+        with self._lock(worksheet):
+            if self._fresh(worksheet):
+                # Another session fetched it while this one waited.
+                self.stats["coalesced"] += 1
+                return self._frames[worksheet][0]
+            self.stats["misses"] += 1
+            df = self._fetch(worksheet, ctx)
+            self._remember(worksheet, df, fetched=True)
+            return df
+
+    def _write(self, worksheet, df):
+        if self.mirror is not None:
+            self.stats["queued"] += 1
+            self.mirror.commit(worksheet, df, "replace")
+        else:
+            self.stats["writes"] += 1
+            self.conn.update(worksheet=worksheet, data=df)
+        self._remember(worksheet, df.copy())
+
+    def _upsert(self, worksheet, key_col, key, values, defaults=None):
+        if self.mirror is not None:
+            df, idx, _ = apply_upsert(self.read(worksheet), key_col, key, values, defaults)
+            self.stats["queued"] += 1
+            self.mirror.commit(worksheet, df, "upsert", {"key_col": key_col, "key": key, "values": values, "defaults": defaults})
+        elif self._push_row(worksheet, key_col, key, values, defaults):
+            # Written without reading the rows; a cached frame gets the same
+            # change but keeps its age, so it is still re-read when due. With
+            # nothing cached only the saved values are known.
+            self.stats["writes"] += 1
+            cached = self._frames.get(worksheet)
+            if cached is None: return pd.Series({**(defaults or {}), key_col: key, **values})
+            df, idx, _ = apply_upsert(cached[0].copy(), key_col, key, values, defaults)
+            self._remember(worksheet, df, key=key, at=cached[1])
+            return df.loc[idx].copy()
+        else:
+            # Rewrites the whole sheet, so it starts from a fresh read of it.
+            self.stats["writes"] += 1
+            self.stats["misses"] += 1
+            df, idx, _ = apply_upsert(self._fetch(worksheet), key_col, key, values, defaults)
+            self.conn.update(worksheet=worksheet, data=df)
+        self._remember(worksheet, df.copy(), key=key)
+        return df.loc[idx].copy()
+
+    def _patch(self, worksheet, ops, today):
+        df = apply_ops(normalize_checklist(self.read(worksheet)), ops, today).reset_index(drop=True)
+        if self.mirror is not None:
+            self.stats["queued"] += 1
+            self.mirror.commit(worksheet, df, "ops", {"ops": ops, "today": str(today)})
+        else:
+            self.stats["writes"] += 1
+            self.conn.update(worksheet=worksheet, data=df)
+        self._remember(worksheet, df.copy())
+        return df
+
+    def _fresh(self, worksheet):
+        entry = self._frames.get(worksheet)
+        return entry is not None and time.monotonic() - entry[1] < self.max_age
+
+    def _fetch(self, worksheet, ctx=None):
+        if ctx is not None: _attach_ctx(ctx)
+        df = self.mirror.load(worksheet) if self.mirror is not None else None
+        if df is not None:
+            self.stats["local_reads"] += 1
+            return df
+        df = self._read_tail(worksheet)
+        if df is not None:
+            self.stats["tail_reads"] += 1
+        else:
+            self.stats["reads"] += 1
+            df = self.conn.read(worksheet=worksheet, usecols=WORKSHEETS.get(worksheet), ttl=0)
+            self._full_at[worksheet] = time.monotonic()
+        if self.mirror is not None:
+            self.mirror.refresh(worksheet, df)
+            df = self._replay_pending(worksheet, df)
+        return df
+
+    def _replay_pending(self, worksheet, df):
+        # Queued writes the sheet has not seen yet are re-applied, so a fresh
+        # read never rolls back what the user already saw as saved.
+        for op in self.mirror.pending():
+            if op["worksheet"] != worksheet: continue
+            p = op["payload"]
+            if op["op"] == "replace":
+                df = self.mirror.snapshot(worksheet)
+            elif op["op"] == "upsert":
+                df = apply_upsert(df, p["key_col"], p["key"], p["values"], p["defaults"])[0]
+            elif op["op"] == "ops":
+                df = apply_ops(normalize_checklist(df), p["ops"], p["today"]).reset_index(drop=True)
+        return df
+
+    def _read_tail(self, worksheet):
+        # Re-reads the rows dated within TAIL_DAYS (one range read below the
+        # first of them) on top of the cached older rows. None means a full
+        # read is due: nothing cached, no gspread handle, history too old, or
+        # the sheet's older keys no longer line up with the cached ones.
+        key_col = TAIL_READS.get(worksheet)
+        entry = self._frames.get(worksheet)
+        if key_col is None or entry is None: return None
+        if time.monotonic() - self._full_at.get(worksheet, float("-inf")) >= HISTORY_MAX_AGE: return None
+        ws = _worksheet_handle(self.conn, worksheet)
+        if ws is None: return None
+        cached = entry[0]
+        cutoff = pd.Timestamp(date.today() - timedelta(days=TAIL_DAYS))
+        try:
+            header = ws.row_values(1)
+            if key_col not in header or key_col not in cached.columns: return None
+            keys = _dates(pd.Series(ws.col_values(header.index(key_col) + 1)[1:], dtype=object))
+            recent = keys >= cutoff
+            if not recent.any(): return None
+            start = int(recent.to_numpy().argmax())
+            # Rows after the first recent one are all re-read, so only the
+            # rows above it have to match the cached frame key for key.
+            if (keys.iloc[start:] < cutoff).any(): return None
+            seen = _dates(cached[key_col])
+            kept = int((seen >= cutoff).to_numpy().argmax()) if (seen >= cutoff).any() else len(seen)
+            older, base = keys.iloc[:start], seen.iloc[:kept]
+            if older.isna().any() or base.isna().any() or list(older) != list(base): return None
+            last = rowcol_to_a1(1, len(header))[:-1]
+            rows = ws.get_values(f"A{start + 2}:{last}", value_render_option="UNFORMATTED_VALUE", date_time_render_option="FORMATTED_STRING")
+        except Exception:
+            return None  # fall back to reading the whole worksheet
+        # Parsed like conn.read(): gspread trims empty trailing cells, and
+        # blank rows are dropped.
+        rows = [list(r) + [""] * (len(header) - len(r)) for r in rows]
+        tail = TextParser([header] + rows, usecols=WORKSHEETS.get(worksheet)).read().dropna(how="all")
+        return pd.concat([cached.iloc[:kept], tail], ignore_index=True)
+
+    def _push_row(self, worksheet, key_col, key, values, defaults=None):
+        # Patches the key's row cell by cell, or appends it. Only the header and
+        # the key column are read, so a save costs the same however long the
+        # sheet is; returns False when the row cannot be placed that way.
+        ws = _worksheet_handle(self.conn, worksheet)
+        if ws is None: return False
+        try:
+            header = ws.row_values(1)
+            if key_col not in header or any(c not in header for c in values): return False
+            # The target row comes from the sheet's own key column: a read frame
+            # skips blank rows, so its positions can drift from the sheet's.
+            keys = pd.DataFrame({key_col: ws.col_values(header.index(key_col) + 1)[1:]}, dtype=object)
+            rows = keys.index[_key_series(keys, key_col, key) == key]
+            if len(rows) > 1: return False
+            if len(rows):
+                pos = rows[0] + 2  # 1-based, below the header row
+                ws.batch_update([
+                    {"range": rowcol_to_a1(pos, header.index(col) + 1), "values": [[cell_value(val)]]}
+                    for col, val in values.items()
+                ], value_input_option="USER_ENTERED")
+            else:
+                row = {**(defaults or {}), key_col: key, **values}
+                if any(c not in header for c in row): return False
+                ws.append_row([cell_value(row.get(c)) for c in header], value_input_option="USER_ENTERED", table_range="A1")
+            return True
+        except Exception:
+            return False  # fall back to rewriting the whole worksheet
+
+    def _remember(self, worksheet, df, fetched=False, key=None, at=None):
+        # Writes always start a new version; a re-fetch only does when its
+        # content differs from the last fetch, so derived caches keyed on the
+        # version survive an unchanged sheet expiring.
+        digest = _digest(df) if fetched else None
+        if digest is None or digest != self._digests.get(worksheet):
+            self._versions[worksheet] = self.version(worksheet) + 1
+            log = self._changes.setdefault(worksheet, [])
+            log.append((self.version(worksheet), key))
+            del log[:-CHANGE_LOG]
+        self._digests[worksheet] = digest
+        self._frames[worksheet] = (df, time.monotonic() if at is None else at)
+
+
+# --- THREAD HELPERS ---
+# conn.read() goes through st.cache_data, which expects the script-run context
+# of the session that started the worker thread.
+def _script_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx(suppress_warning=True)
+    except ImportError:
+        return None
+
+def _attach_ctx(ctx):
+    from streamlit.runtime.scriptrunner import add_script_run_ctx
+    add_script_run_ctx(threading.current_thread(), ctx)
+
+
+# --- ROW HELPERS ---
+def apply_upsert(df, key_col, key, values, defaults=None):
+    matches = df.index[_key_series(df, key_col, key) == key] if not df.empty else []
+    if len(matches):
+        idx = matches[0]
+        for col, val in values.items(): _set_cell(df, idx, col, val)
+    else:
+        row = dict(defaults or {})
+        row[key_col] = key
+        row.update(values)
+        df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+        idx = df.index[-1]
+    return df, idx, bool(len(matches))
+
+def _digest(df):
+    # Position-aware but dtype-blind (see row_hashes): a tail read spliced onto
+    # cached rows can type a column differently from a full read of the same cells.
+    try: return (tuple(df.columns), int((row_hashes(df).to_numpy() * HASH_PRIME + pd.util.hash_array(np.arange(len(df)))).sum()))
+    except TypeError: return None  # unhashable cells: treat every fetch as new
+
+def row_hashes(df):
+    # Ignores how cells are typed: a save can leave a column object or float,
+    # and an export read back has its own dtypes, without changing any values.
+    hashes = np.zeros(len(df), dtype="uint64")
+    for c in df.columns: hashes = hashes * HASH_PRIME + _cell_hashes(df[c])
+    return pd.Series(hashes, index=df.index)
+
+def _cell_hashes(col):
+    # Numbers hash by float value whatever the column's dtype, everything else
+    # as text, and blanks ("", NaN, None) all as "".
+    if pd.api.types.is_numeric_dtype(col):
+        num = col.to_numpy("float64", na_value=np.nan)
+        return np.where(np.isnan(num), BLANK_HASH, pd.util.hash_array(num))
+    if isinstance(col.dtype, pd.StringDtype): return pd.util.hash_array(col.fillna("").to_numpy(object))
+    values = col.to_numpy(object)
+    blank = pd.isna(values)
+    number = np.fromiter((isinstance(v, Number) for v in values), bool, len(values)) & ~blank
+    text = pd.util.hash_array(np.where(blank | number, "", values).astype(str).astype(object))
+    if not number.any(): return text
+    return np.where(number, pd.util.hash_array(np.where(number, values, np.nan).astype("float64")), text)
+
+def _worksheet_handle(conn, worksheet):
+    # Only service-account connections expose the gspread worksheet needed for
+    # cell-level writes; anything else goes through a full conn.update().
+    select = getattr(getattr(conn, "client", None), "_select_worksheet", None)
+    if select is None: return None
+    try: return select(worksheet=worksheet)
+    except Exception: return None
+
+def _dates(col):
+    return pd.to_datetime(col.astype(str), errors="coerce")
+
+def _key_series(df, key_col, key):
+    if key_col not in df.columns: return pd.Series(None, index=df.index, dtype=object)
+    if isinstance(key, date):
+        return pd.to_datetime(df[key_col].astype(str), errors="coerce").dt.date
+    return df[key_col].astype(str)
+
+def _set_cell(df, idx, col, val):
+    if col not in df.columns: df[col] = pd.Series(None, index=df.index, dtype=object)
+    try: df.at[idx, col] = val
+    except (TypeError, ValueError):
+        df[col] = df[col].astype(object)
+        df.at[idx, col] = val
+
+def cell_value(val):
+    if val is None or (not isinstance(val, str) and pd.isna(val)): return ""
+    if isinstance(val, (date, datetime)): return str(val)
+    if hasattr(val, "item"): return val.item()
+    return val
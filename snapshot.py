@@ -0,0 +1,100 @@
+"""Precompute the dashboard's metrics into a snapshot file.
+
+Reads Logs from Google Sheets (using the app's .streamlit/secrets.toml) or from a
+local export, computes the streaks, this week's progress, jackpot, consistency
+and focus areas, and lifetime XP, and writes them as compact JSON:
+
+    python snapshot.py --logs logs-2026-10-17.csv --out snapshot.json
+
+Point TRACKER_SNAPSHOT at the output and the dashboard shows these numbers
+instead of recomputing them, for as long as they match today's Logs.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+from partitions import LogPartitions
+from schema import HABIT_KEYS
+from scoring import compute_streaks, lifetime_metrics, week_metrics
+from sheets import WORKSHEETS
+
+SNAPSHOT_VERSION = 1
+
+
+# --- METRICS ---
+def ist_today():
+    return (datetime.utcnow() + timedelta(hours=5, minutes=30)).date()
+
+def build_snapshot(partitions, today):
+    # Everything the header streak and the analytics metrics show.
+    rollup = partitions.rollup(today)
+    streak = compute_streaks(partitions.history(), today, HABIT_KEYS) if partitions.years() else {"current": 0, "longest": 0, "habits": {}}
+    return {
+        "version": SNAPSHOT_VERSION,
+        "today": today.isoformat(),
+        "fingerprint": partitions.fingerprint(),
+        "generated": time.time(),
+        "streak": streak,
+        "week": week_metrics(rollup, today),
+        "lifetime": lifetime_metrics(rollup),
+    }
+
+def matches(snap, partitions, today):
+    # A snapshot is only trusted for the IST day and the exact Logs it was built from.
+    return bool(snap) and snap.get("version") == SNAPSHOT_VERSION and snap.get("today") == today.isoformat() and snap.get("fingerprint") == partitions.fingerprint()
+
+
+# --- FILES ---
+def read_logs(path=None):
+    # A CSV/Parquet export, or the live Logs sheet when no path is given.
+    if path is None:
+        import streamlit as st
+        from streamlit_gsheets import GSheetsConnection
+        conn = st.connection("gsheets", type=GSheetsConnection)
+        return conn.read(worksheet="Logs", usecols=WORKSHEETS["Logs"], ttl=0)
+    if path.lower().endswith(".parquet"): return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+def load_snapshot(path):
+    try:
+        with open(path) as f: return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_snapshot(snap, path):
+    # Written beside the target and renamed, so a reader never sees half a file.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f: json.dump(snap, f, default=_json_default)
+    os.replace(tmp, path)
+
+def _json_default(val):
+    if hasattr(val, "item"): return val.item()
+    raise TypeError(f"{type(val).__name__} is not JSON serializable")
+
+
+# --- CLI ---
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs", help="CSV or Parquet export of Logs (default: read the Google Sheet)")
+    parser.add_argument("--out", default="snapshot.json", help="snapshot file to write")
+    parser.add_argument("--today", type=date.fromisoformat, help="compute as of this date (default: today in IST)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    partitions = LogPartitions()
+    partitions.load(read_logs(args.logs))
+    snap = build_snapshot(partitions, args.today or ist_today())
+    write_snapshot(snap, args.out)
+    week, lifetime = snap["week"], snap["lifetime"]
+    print(
+        f"{args.out}: week {week['year']}-W{week['week']} {week['pct']}% ({week['reward']} Pts), "
+        f"streak {snap['streak']['current']} (best {snap['streak']['longest']}), "
+        f"lifetime {lifetime['score']} XP in {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+
+if __name__ == "__main__":
+    main()
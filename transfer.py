@@ -0,0 +1,99 @@
+import io
+
+import pandas as pd
+
+from schema import HABIT_KEYS, LOG_COLUMNS, TRUTHY
+
+FALSY = ["FALSE", "F", "NO", "OFF"]
+
+
+# --- IMPORT ---
+def read_table(upload, name=None):
+    # CSV or Parquet, picked by file extension; every cell is read as text.
+    name = (name or getattr(upload, "name", "") or "").lower()
+    if name.endswith(".parquet"): return pd.read_parquet(upload).astype(object)
+    return pd.read_csv(upload, dtype=str, keep_default_na=False)
+
+def validate_logs(df):
+    # Checks an import against the Logs schema. Returns (rows keyed by
+    # "YYYY-MM-DD", errors); the rows are only usable when errors is empty.
+    errors = []
+    if "Date" not in df.columns: return None, ["Missing required column: Date"]
+    unknown = [c for c in df.columns if c not in LOG_COLUMNS]
+    if unknown: errors.append(f"Unknown columns: {', '.join(map(str, unknown))}")
+
+    dates = pd.to_datetime(df["Date"].astype(str), errors="coerce", format="mixed")
+    bad = df.index[dates.isna()]
+    if len(bad): errors.append(f"Unreadable Date on row(s) {_rows(bad)}")
+    dupes = df.index[dates.notna() & dates.duplicated(keep=False)]
+    if len(dupes): errors.append(f"Date appears more than once on row(s) {_rows(dupes)}")
+
+    out = pd.DataFrame(index=dates.dt.strftime("%Y-%m-%d").values)
+    for col in [c for c in LOG_COLUMNS[1:] if c in df.columns]:
+        values = df[col].where(df[col].notna(), "").astype(str).str.strip()
+        if col in HABIT_KEYS:
+            flags = _flags(values)
+            bad = df.index[flags.isna().values]
+            if len(bad): errors.append(f"{col} must be a yes/no flag on row(s) {_rows(bad)}")
+            out[col] = flags.fillna(0).astype(int).values
+        else:
+            out[col] = values.values
+    return out, errors
+
+def merge_logs(existing, incoming):
+    # Imported cells overwrite the matching Date's cells; dates not in the sheet
+    # become new rows with the usual blanks. Returns (sheet frame, counts).
+    existing = existing.copy()
+    if "Date" not in existing.columns: existing["Date"] = pd.Series(dtype=object)
+    keys = pd.to_datetime(existing["Date"].astype(str), errors="coerce", format="mixed").dt.strftime("%Y-%m-%d")
+    hit = keys.isin(incoming.index)
+    for col in incoming.columns:
+        if col not in existing.columns: existing[col] = _blank(col)
+        existing[col] = existing[col].astype(object).where(~hit, keys.map(incoming[col].astype(object)))
+
+    new = incoming[~incoming.index.isin(keys.dropna())]
+    added = new.reindex(columns=[c for c in existing.columns if c != "Date"])
+    for col in added.columns: added[col] = added[col].astype(object).where(added[col].notna(), _blank(col))
+    added.insert(0, "Date", new.index)
+
+    merged = pd.concat([existing, added.reset_index(drop=True)], ignore_index=True)
+    order = pd.to_datetime(merged["Date"].astype(str), errors="coerce", format="mixed").sort_values(kind="stable", na_position="last").index
+    merged = merged.loc[order].reset_index(drop=True)
+    return merged, {"updated": int(incoming.index.isin(keys.dropna()).sum()), "added": len(new)}
+
+
+# --- EXPORT ---
+def export_bytes(df, fmt="csv"):
+    # The whole file in memory: download_button keeps the bytes it serves anyway.
+    if fmt == "parquet":
+        # Keeps the sheet's dtypes and blanks; object columns mixing text and numbers are written as text.
+        buf = io.BytesIO()
+        df.assign(**{c: _text_cells(df[c]) for c in df.columns if df[c].dtype == object}).to_parquet(buf, index=False)
+        return buf.getvalue()
+    return df.to_csv(index=False).encode("utf-8")
+
+def export_name(worksheet, day, fmt="csv"):
+    return f"{worksheet.lower()}-{day}.{fmt}"
+
+
+# --- HELPERS ---
+def _flags(values):
+    # 1/0 for flag-like text, NaN for anything else.
+    upper = values.str.upper()
+    num = pd.to_numeric(values, errors="coerce")
+    out = pd.Series(float("nan"), index=values.index)
+    out[num.notna()] = (num[num.notna()] > 0).astype(float)
+    out[upper.isin(TRUTHY)] = 1.0
+    out[upper.isin(FALSY) | (values == "")] = 0.0
+    return out
+
+def _text_cells(col):
+    return col.map(lambda v: v if isinstance(v, str) or pd.isna(v) else str(v))
+
+def _blank(col):
+    return 0 if col in HABIT_KEYS else ""
+
+def _rows(index, limit=5):
+    # 1-based data rows as a spreadsheet user would count them (header is row 1).
+    rows = [str(i + 2) for i in list(index)[:limit]]
+    return ", ".join(rows) + ("…" if len(index) > limit else "")